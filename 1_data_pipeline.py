@@ -1,36 +1,176 @@
 import pandas as pd
 import numpy as np
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from data_engine import INPUT_FILE, build_snapshot, clean_brand, dataset_version, snapshot_path
+from keyword_index import KeywordIndex, keyword_index_path
 
-def clean_data(input_file, output_file):
+DEFAULT_CHUNKSIZE = 100_000
+DEDUP_KEY = ['brand', 'name', 'year']
+
+def peak_memory_mb():
+    """Peak resident memory of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def clean_chunk(df):
     """
-    Reads raw perfume data, cleans years and olfactory families, 
-    and exports a production-ready CSV.
+    Cleans years, olfactory families and brand names of one block of rows.
     """
-    print("🔄 Loading raw data...")
-    try:
-        df = pd.read_csv(input_file)
-    except FileNotFoundError:
-        print(f"❌ Error: File '{input_file}' not found.")
-        return
-
     # 1. Clean 'Year' column
     # Convert to numeric, turn 0 into NaN, remove rows without a year
-    df['year'] = pd.to_numeric(df['year'], errors='coerce')
-    df['year'] = df['year'].replace(0, np.nan)
-    df_clean = df.dropna(subset=['year'])
-    df_clean['year'] = df_clean['year'].astype(int)
+    year = pd.to_numeric(df['year'], errors='coerce').replace(0, np.nan)
+    df_clean = df[year.notna()].copy()
+    df_clean['year'] = year.dropna().astype(int)
 
     # 2. Clean 'Families' column
     # Fill missing values with 'Unclassified'
     df_clean['families'] = df_clean['families'].fillna('Unclassified')
-    
+
     # 3. Standardize 'Brand' names
     # Title case and remove trailing spaces
-    df_clean['brand'] = df_clean['brand'].astype(str).str.strip().str.title()
+    df_clean['brand'] = clean_brand(df_clean['brand'])
+    return df_clean
+
+def clean_data(input_file, output_file, chunksize=None):
+    """
+    Reads raw perfume data, cleans years and olfactory families,
+    and exports a production-ready CSV.
+
+    With chunksize set, the input is streamed in blocks of that many rows and
+    each cleaned block is appended to the output, so memory stays bounded
+    regardless of the input size.
+    """
+    print("🔄 Loading raw data...")
+    if not os.path.exists(input_file):
+        print(f"❌ Error: File '{input_file}' not found.")
+        return
 
-    print(f"✅ Data cleaned successfully! Saved {len(df_clean)} rows to '{output_file}'.")
-    df_clean.to_csv(output_file, index=False)
+    if chunksize is None:
+        df_clean = clean_chunk(pd.read_csv(input_file))
+        df_clean.to_csv(output_file, index=False)
+        rows = len(df_clean)
+    else:
+        rows = 0
+        # Write to a temp file so a failed run never leaves a truncated output behind
+        tmp_file = output_file + '.tmp'
+        with pd.read_csv(input_file, chunksize=chunksize) as reader:
+            for i, chunk in enumerate(reader):
+                df_clean = clean_chunk(chunk)
+                df_clean.to_csv(tmp_file, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+                rows += len(df_clean)
+                print(f"   ...chunk {i + 1}: {rows:,} rows written (peak memory {peak_memory_mb():.0f} MB)")
+        os.replace(tmp_file, output_file)
+
+    print(f"✅ Data cleaned successfully! Saved {rows} rows to '{output_file}'.")
+    print(f"📈 Peak memory: {peak_memory_mb():.0f} MB")
+
+def _clean_source(job):
+    # Runs in a worker process: one source file -> one cleaned temp CSV
+    input_file, output_file, chunksize = job
+    clean_data(input_file, output_file, chunksize=chunksize)
+    return output_file
+
+def dedup_keys(df):
+    """Stable 64-bit hash of (brand, name, year); names compare case- and space-insensitively."""
+    key = pd.DataFrame({
+        'brand': df['brand'].astype(str),
+        'name': df['name'].astype(str).str.strip().str.casefold(),
+        'year': df['year'].astype(str),
+    })
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+def ingest_sources(input_files, output_file, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Cleans several regional exports in parallel and merges them into one CSV.
+
+    Each source is cleaned in its own process (streamed in chunks). The cleaned
+    files are then appended in the given order, dropping rows whose
+    (brand, name, year) was already seen, so earlier sources win on conflicts.
+    """
+    missing = [f for f in input_files if not os.path.exists(f)]
+    if missing:
+        print(f"❌ Error: File(s) not found: {', '.join(missing)}")
+        return
+
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, len(input_files))
+    print(f"🔄 Cleaning {len(input_files)} sources on {workers} worker(s)...")
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmp_dir:
+        jobs = [(f, os.path.join(tmp_dir, f"{i}.csv"), chunksize) for i, f in enumerate(input_files)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            cleaned_files = list(pool.map(_clean_source, jobs))
+        print(f"✅ Sources cleaned in {time.perf_counter() - start:.1f}s")
+
+        # Merge + deduplicate, streaming so memory only holds one chunk and the key hashes
+        seen = set()
+        columns = None
+        rows = dropped = 0
+        tmp_file = output_file + '.tmp'
+        for source, cleaned in zip(input_files, cleaned_files):
+            if not os.path.exists(cleaned): continue
+            with pd.read_csv(cleaned, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    first = columns is None
+                    if first:
+                        columns = list(chunk.columns)
+                    chunk = chunk.reindex(columns=columns)
+
+                    fresh = np.zeros(len(chunk), dtype=bool)
+                    for i, key in enumerate(dedup_keys(chunk).tolist()):
+                        if key not in seen:
+                            seen.add(key)
+                            fresh[i] = True
+                    chunk[fresh].to_csv(tmp_file, mode='w' if first else 'a', header=first, index=False)
+                    rows += int(fresh.sum())
+                    dropped += int((~fresh).sum())
+            print(f"   ...merged '{source}': {rows:,} unique rows so far")
+        os.replace(tmp_file, output_file)
+
+    print(f"✅ Consolidated {len(input_files)} sources: {rows:,} rows ({dropped:,} duplicates dropped) "
+          f"to '{output_file}' in {time.perf_counter() - start:.1f}s.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the raw Aromo export(s) and build the dashboard snapshot.")
     # Ensure your source file is named 'aromo_english.csv'
-    clean_data('aromo_english.csv', 'aromo_cleaned.csv')
\ No newline at end of file
+    parser.add_argument('inputs', nargs='*', default=['aromo_english.csv'],
+                        help="one or more source exports; several are cleaned in parallel and merged")
+    parser.add_argument('-o', '--output', default='aromo_cleaned.csv')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help=f"stream the input in blocks of this many rows (e.g. {DEFAULT_CHUNKSIZE:,})")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for multi-source ingestion (default: CPU count)")
+    parser.add_argument('--skip-snapshot', action='store_true',
+                        help="only clean; the snapshot loads the whole dataset into memory")
+    parser.add_argument('--data-file', default=os.environ.get('AROMO_DATA_FILE', INPUT_FILE),
+                        help="the file the dashboard/API serve (AROMO_DATA_FILE); the snapshot and keyword "
+                             "index are always built from it, e.g. pass the -o path to serve the cleaned data")
+    args = parser.parse_args()
+
+    if len(args.inputs) == 1:
+        clean_data(args.inputs[0], args.output, chunksize=args.chunksize)
+    else:
+        ingest_sources(args.inputs, args.output, workers=args.workers,
+                       chunksize=args.chunksize or DEFAULT_CHUNKSIZE)
+    # One rule in both modes: the snapshot belongs to the file the dashboard loads (and is tagged with it)
+    snapshot_source = args.data_file
+    if args.skip_snapshot: sys.exit(0)
+    if not os.path.exists(snapshot_source):
+        print(f"⚠️ Dashboard data file '{snapshot_source}' not found; no snapshot built.")
+        sys.exit(0)
+
+    # Columnar snapshot with all dashboard columns precomputed (read by app.py)
+    print("🔄 Building dashboard snapshot...")
+    snapshot = build_snapshot(snapshot_source)
+    print(f"✅ Snapshot ready: {len(snapshot)} rows in '{snapshot_path(snapshot_source)}'.")
+
+    # Serialized keyword index over the same rows (used by SCENT SEARCH)
+    index_file = keyword_index_path(snapshot_source)
+    KeywordIndex.build(snapshot).save(index_file, dataset_version(snapshot_source))
+    print(f"✅ Keyword index ready: '{index_file}'.")
@@ -1,45 +1,154 @@
 import pandas as pd
-from sentence_transformers import SentenceTransformer
-import pickle
+import numpy as np
+import argparse
+import hashlib
 import os
+import time
+from embedding_store import write_embedding_store, STORE_PREFIX
 
 # --- CONFIGURATION ---
-INPUT_FILE = 'aromo_english.csv'
-OUTPUT_MODEL = 'aromo_embeddings.pkl'
+# Same dataset as the dashboard/API (AROMO_DATA_FILE), so the store's row keys line up with it
+INPUT_FILE = os.environ.get('AROMO_DATA_FILE', 'aromo_english.csv')
+OUTPUT_MODEL = STORE_PREFIX  # -> aromo_embeddings.npy / _index.arrow / .json
+MODEL_NAME = 'all-MiniLM-L6-v2'
 
-def generate_embeddings():
-    if not os.path.exists(INPUT_FILE):
-        print(f"[ERROR] Input file {INPUT_FILE} not found. Run pipeline first.")
+# Encoder defaults (CPU boxes)
+BATCH_SIZE = 64
+PROCESSES = 1
+
+# Persistent store of already-encoded texts: sha1(semantic_text) -> vector
+CACHE_FILE = 'aromo_embedding_cache.npz'
+
+def text_hashes(texts):
+    """SHA-1 digest of every text, as a fixed-width bytes array."""
+    return np.array([hashlib.sha1(t.encode('utf-8')).digest() for t in texts], dtype='S20')
+
+def load_vector_cache(cache_file=CACHE_FILE, model_name=MODEL_NAME):
+    """Returns (hashes, vectors) from a previous run, or empty arrays if unusable."""
+    empty = (np.array([], dtype='S20'), None)
+    if not os.path.exists(cache_file): return empty
+    try:
+        with np.load(cache_file) as data:
+            # Vectors from a different model are not comparable -> start over
+            if str(data['model']) != model_name: return empty
+            return data['hashes'], data['vectors']
+    except (OSError, KeyError, ValueError):
+        print(f"[WARN] Ignoring unreadable cache {cache_file}.")
+        return empty
+
+def save_vector_cache(hashes, vectors, cache_file=CACHE_FILE, model_name=MODEL_NAME):
+    # Write-then-rename so an interrupted run never corrupts the store
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        np.savez(f, model=np.array(model_name), hashes=hashes, vectors=vectors)
+    os.replace(tmp_file, cache_file)
+
+def encode_texts(model, texts, batch_size=BATCH_SIZE, processes=PROCESSES, threads=None):
+    """
+    Encodes texts with length-bucketed batches, optionally across several processes.
+
+    Texts are sorted by length so every batch pads to similar lengths, encoded in
+    that order and put back in input order. Returns float32 vectors.
+    """
+    cpus = os.cpu_count() or 1
+    threads = threads or max(1, cpus // processes)
+    order = np.argsort([len(t) for t in texts], kind='stable')
+    sorted_texts = [texts[i] for i in order]
+
+    start = time.perf_counter()
+    if processes > 1:
+        # Workers are spawned and read the thread count from the environment
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        os.environ['MKL_NUM_THREADS'] = str(threads)
+        pool = model.start_multi_process_pool(target_devices=['cpu'] * processes)
+        try:
+            chunk_size = max(batch_size, min(5000, len(texts) // (processes * 4) or 1))
+            vectors = model.encode_multi_process(sorted_texts, pool, batch_size=batch_size, chunk_size=chunk_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    else:
+        import torch
+        torch.set_num_threads(threads)
+        vectors = model.encode(sorted_texts, batch_size=batch_size, show_progress_bar=True)
+    elapsed = time.perf_counter() - start
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    embeddings = np.empty_like(vectors)
+    embeddings[order] = vectors
+    print(f"[INFO] Encoded {len(texts)} texts in {elapsed:.1f}s "
+          f"({len(texts) / max(elapsed, 1e-9):.0f} sentences/sec, batch {batch_size}, "
+          f"{processes} process(es) x {threads} thread(s)).")
+    return embeddings
+
+def generate_embeddings(input_file=INPUT_FILE, dtype='float32', batch_size=BATCH_SIZE, processes=PROCESSES, threads=None):
+    if not os.path.exists(input_file):
+        print(f"[ERROR] Input file {input_file} not found. Run pipeline first.")
         return
 
-    print("[INFO] Loading dataset...")
-    df = pd.read_csv(INPUT_FILE)
+    print(f"[INFO] Loading dataset {input_file}...")
+    df = pd.read_csv(input_file)
     df = df.fillna('')
 
     # Create a "Soup" of text for the AI to understand the context
     # Combining Brand, Name, Family, Type and Notes into one string
     print("[INFO] Preprocessing text data...")
     df['semantic_text'] = (
-        df['brand'] + " " + 
-        df['name'] + " " + 
-        df['families'] + " " + 
-        df['type'] + " " + 
+        df['brand'] + " " +
+        df['name'] + " " +
+        df['families'] + " " +
+        df['type'] + " " +
         df['top_notes']
     )
-    
+
     corpus = df['semantic_text'].tolist()
-    
-    print("[INFO] Loading Sentence-Transformer model (all-MiniLM-L6-v2)...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    print(f"[INFO] Generating embeddings for {len(corpus)} items. This may take a while...")
-    embeddings = model.encode(corpus, show_progress_bar=True)
-    
-    print(f"[INFO] Saving embeddings to {OUTPUT_MODEL}...")
-    with open(OUTPUT_MODEL, 'wb') as f:
-        pickle.dump(embeddings, f)
-        
+    hashes = text_hashes(corpus)
+
+    # Reuse vectors of unchanged rows; only new or edited texts are encoded
+    cached_hashes, cached_vectors = load_vector_cache()
+    position = {h: i for i, h in enumerate(cached_hashes.tolist())}
+    todo = {}
+    for i, h in enumerate(hashes.tolist()):
+        if h not in position and h not in todo: todo[h] = i
+    print(f"[INFO] {len(corpus) - len(todo)} of {len(corpus)} items found in the embedding cache.")
+
+    new_hashes = np.array(list(todo.keys()), dtype='S20')
+    new_vectors = None
+    if todo:
+        print(f"[INFO] Loading Sentence-Transformer model ({MODEL_NAME})...")
+        from sentence_transformers import SentenceTransformer  # torch import only when something needs encoding
+        model = SentenceTransformer(MODEL_NAME)
+
+        print(f"[INFO] Generating embeddings for {len(todo)} new or changed items...")
+        new_vectors = encode_texts(model, [corpus[i] for i in todo.values()],
+                                   batch_size=batch_size, processes=processes, threads=threads)
+
+    # Reassemble the full matrix in dataset row order
+    store_hashes = np.concatenate([cached_hashes, new_hashes])
+    parts = [v for v in (cached_vectors, new_vectors) if v is not None]
+    store_vectors = np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+    lookup = {h: i for i, h in enumerate(store_hashes.tolist())}
+    rows = np.array([lookup[h] for h in hashes.tolist()], dtype=np.int64)
+    embeddings = store_vectors[rows]
+
+    # Keep only vectors still referenced by the dataset so the store doesn't grow forever
+    live = np.unique(rows)
+    save_vector_cache(store_hashes[live], store_vectors[live])
+
+    print(f"[INFO] Saving {dtype} embeddings to {OUTPUT_MODEL}.npy (+ row index)...")
+    write_embedding_store(embeddings, df, MODEL_NAME, prefix=OUTPUT_MODEL, dtype=dtype)
+
     print("[SUCCESS] AI Engine is ready.")
 
 if __name__ == "__main__":
-    generate_embeddings()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the perfume embedding store.")
+    parser.add_argument('--data-file', default=INPUT_FILE,
+                        help="dataset to embed; must be the file the dashboard/API serve (AROMO_DATA_FILE)")
+    parser.add_argument('--float16', action='store_true', help="store half-precision vectors (half the size, still shared in place)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--processes', type=int, default=PROCESSES,
+                        help="encoder processes (e.g. one per physical core)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="torch threads per process (default: cores / processes)")
+    args = parser.parse_args()
+    generate_embeddings(args.data_file, dtype='float16' if args.float16 else 'float32', batch_size=args.batch_size,
+                        processes=args.processes, threads=args.threads)
@@ -0,0 +1,270 @@
+import os
+import threading
+
+import pandas as pd
+
+import keyword_index
+from data_engine import (INPUT_FILE, dataset_version, load_catalog, build_note_table, build_name_tokens, extend_name_tokens,
+                         build_market_cube, brand_profile, scope_mask, scope_view)
+from embedding_store import load_embedding_store, align_rows
+from semantic_search import QueryEncoder, hybrid_search, model_ready, warm_model
+from similarity import catalog_similarity
+
+# --- CONFIGURATION ---
+DATA_FILE = os.environ.get('AROMO_DATA_FILE', INPUT_FILE)
+SCOPES = ["All Products", "Fine Fragrance Only"]
+TOP_TABLES = ['brands', 'families', 'years', 'words', 'notes']
+
+
+# --- 1. SHARED DATASET STATE ---
+class VersionMismatch(ValueError):
+    pass
+
+
+class CatalogState:
+    """Every derived structure of one dataset version, built on first use and then shared.
+
+    Used by the dashboard (one instance per version via st.cache_resource) and by
+    api_server.py. Each structure is built once even under concurrent callers
+    (per-key lock) and is read-only afterwards. Embedding-based structures also
+    take the embedding version and are rebuilt when the store changes.
+    `previous` (the live state a new version replaces) lets a release that only
+    appends rows reuse what was already built for the old rows.
+    """
+
+    def __init__(self, version, data_file=DATA_FILE, previous=None):
+        self.version = version
+        self.data_file = data_file
+        self.previous = previous
+        self._values = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _memo(self, key, build, tag=None):
+        """Value for key, building it at most once per tag (e.g. embedding version)."""
+        with self._lock:
+            hit = self._values.get(key)
+            if hit is not None and hit[0] == tag: return hit[1]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                hit = self._values.get(key)
+            if hit is not None and hit[0] == tag: return hit[1]
+            value = build()
+            with self._lock:
+                self._values[key] = (tag, value)
+            return value
+
+    def _built(self, key):
+        # Value for key if it was already built, without building it
+        with self._lock:
+            hit = self._values.get(key)
+        return None if hit is None else hit[1]
+
+    # --- DATA ---
+    def data(self):
+        """(df, status) of this version; an empty frame while the file holds other contents.
+
+        The file is read lazily, so by then it may already hold a newer release.
+        Loading it under this version's label would mix two datasets in every
+        version-keyed cache, so a mismatch is reported (and retried on the next
+        call) instead of being cached.
+        """
+        try:
+            return self._memo('data', self._load)
+        except VersionMismatch as e:
+            return pd.DataFrame(), str(e)
+
+    def _load(self):
+        # Memory-maps the prebuilt snapshot (see 1_data_pipeline.py), falls back to the CSV
+        before = dataset_version(self.data_file)
+        df, status = load_catalog(self.data_file)
+        after = dataset_version(self.data_file)
+        if not before == after == self.version:
+            raise VersionMismatch(f"{self.data_file} now holds version {after}, not {self.version}")
+        return df, status
+
+    @property
+    def df(self):
+        # Raises VersionMismatch rather than building scopes or cubes from a frame that is not this version
+        return self._memo('data', self._load)[0]
+
+    def scope(self, filter_mode):
+        # One shared row selection per scope instead of per-session copies
+        return self._memo(('scope', filter_mode), lambda: scope_view(self.df, filter_mode))
+
+    def notes(self):
+        # Long brand-note table, built once per dataset and shared by both scopes
+        return self._memo('notes', lambda: build_note_table(self.df))
+
+    def name_tokens(self):
+        # Name words tokenized once per dataset; scopes only regroup them
+        return self._memo('name_tokens', self._build_name_tokens)
+
+    def _build_name_tokens(self):
+        # Appended rows only: the previous version's tokens are kept and just the new names tokenized
+        previous, self.previous = self.previous, None  # Not kept alive once used
+        names = self.df['display_name']
+        if previous is not None:
+            tokens, data = previous._built('name_tokens'), previous._built('data')
+            if tokens is not None and data is not None:
+                old = data[0]['display_name']
+                if len(old) <= len(names) and names.iloc[:len(old)].equals(old):
+                    return extend_name_tokens(tokens, names, len(old))
+        return build_name_tokens(self.df)
+
+    def cube(self, filter_mode):
+        # Every chart count for one scope, computed once; callers only do lookups
+        return self._memo(('cube', filter_mode), lambda: build_market_cube(
+            self.df, self.notes(), self.name_tokens(), scope_mask(self.df, filter_mode)))
+
+    def note_matrix(self, filter_mode):
+        # Sparse note pairings + note-by-year counts for one scope
+        from note_trends import NoteMatrix  # scipy is imported on first use, not at startup
+        return self._memo(('note_matrix', filter_mode), lambda: NoteMatrix(self.df, scope_mask(self.df, filter_mode)))
+
+    def keyword_index(self):
+        # Prebuilt by 1_data_pipeline.py; rebuilt in memory if missing or stale
+        return self._memo('keyword_index', lambda: keyword_index.load_or_build(
+            self.df, keyword_index.keyword_index_path(self.data_file), self.version))
+
+    # --- EMBEDDINGS (optional; None without the store from 2_ai_engine.py) ---
+    def similarity(self, emb_version):
+        """(engine, catalog_to_item, item_to_catalog, model_name) or None."""
+        def build():
+            if emb_version is None: return None
+            try: vectors, index, meta = load_embedding_store()
+            except FileNotFoundError: return None
+            except ValueError as e:
+                print(f"[WARN] {e}; similarity features are off")
+                return None
+            store_rows = align_rows(index, self.df)
+            aligned = int((store_rows >= 0).sum())
+            message = f"Embeddings for version {self.version}: {aligned:,} of {len(store_rows):,} catalog rows aligned"
+            if aligned < len(store_rows): print(f"[WARN] {message} (store built from another data file? see 2_ai_engine.py)")
+            else: print(f"[INFO] {message}")
+            engine, catalog_to_item, item_to_catalog = catalog_similarity(vectors, store_rows)
+            return engine, catalog_to_item, item_to_catalog, meta['model']
+        return self._memo('similarity', build, tag=emb_version)
+
+    def brand_similarity(self, emb_version):
+        # Brand centroids + top-k competitor table + 2-D map
+        def build():
+            similarity = self.similarity(emb_version)
+            if similarity is None: return None
+            from brand_similarity import BrandSimilarity  # scipy, see note_matrix
+            engine, _, item_to_catalog, _ = similarity
+            brand = self.df['Brand'].array
+            return BrandSimilarity.build(engine.vectors, brand.codes[item_to_catalog], brand.categories)
+        return self._memo('brand_similarity', build, tag=emb_version)
+
+    def warm(self, emb_version):
+        """Builds everything up front (raises if the dataset does not load)."""
+        df, status = self.data()
+        if df.empty: raise ValueError(status)
+        for mode in SCOPES:
+            self.scope(mode); self.cube(mode); self.note_matrix(mode)
+        self.keyword_index()
+        if self.brand_similarity(emb_version) is not None:
+            query_encoder(self.similarity(emb_version)[3])
+
+
+_encoders = {}
+_encoder_lock = threading.Lock()
+
+
+def query_encoder(model_name):
+    """One QueryEncoder (model + query LRU) per process and model; the model loads in the background."""
+    with _encoder_lock:
+        if model_name not in _encoders:
+            _encoders[model_name] = QueryEncoder(model_name)
+            warm_model(model_name)
+        return _encoders[model_name]
+
+
+# --- 2. JSON PAYLOADS ---
+def _counts(series):
+    return [{'label': str(k), 'count': int(v)} for k, v in series.items()]
+
+
+def _perfume(df, row, **extra):
+    rec = df.iloc[int(row)]
+    out = {'row': int(row), 'brand': str(rec['Brand']), 'name': str(rec['display_name']),
+           'family': str(rec['Main_Fam']), 'type': str(rec['Type_Raw']), 'year': int(rec['year_clean']),
+           'notes': str(rec['notes_display']), 'url': str(rec['url'])}
+    out.update(extra)
+    return out
+
+
+def brand_payload(state, brand, filter_mode=SCOPES[0]):
+    """The Brand Analysis numbers for one brand (None for an unknown brand)."""
+    profile = brand_profile(state.cube(filter_mode), brand)
+    if not profile['count']: return None
+    segment = profile['segment']
+    return {
+        'brand': brand, 'scope': filter_mode, 'count': profile['count'],
+        'segment': None if pd.isna(segment) or str(segment) == 'nan' else str(segment),
+        'latest': [_perfume(state.df, r) for r in profile['latest']['row'].tolist()],
+        'years': _counts(profile['years']),
+        'families': _counts(profile['families'].head(8)),
+        'notes': _counts(profile['notes'].head(8)),
+    }
+
+
+def top_payload(state, table, filter_mode=SCOPES[0], n=15):
+    """Global Market tables: brands, families, years, words (name words) or notes."""
+    if table == 'notes':
+        series = state.note_matrix(filter_mode).top_notes(n)
+    else:
+        cube = state.cube(filter_mode)
+        key = {'brands': 'brand_counts', 'families': 'family_counts', 'years': 'year_counts', 'words': 'name_words'}[table]
+        series = cube[key].head(n)
+    return {'table': table, 'scope': filter_mode, 'n_rows': int(state.cube(filter_mode)['n_rows']), 'rows': _counts(series)}
+
+
+def similar_payload(state, emb_version, row, k=10):
+    """Nearest perfumes to catalog row `row` (None without embeddings for it)."""
+    similarity = state.similarity(emb_version)
+    if similarity is None or not 0 <= row < len(state.df): return None
+    engine, catalog_to_item, item_to_catalog, _ = similarity
+    item = catalog_to_item[row]
+    if item < 0: return None
+    ids, scores = engine.similar_to(item, k=k, approximate=engine.centroids is not None)
+    return {'row': row, 'results': [_perfume(state.df, r, score=round(float(s), 4))
+                                    for r, s in zip(item_to_catalog[ids], scores)]}
+
+
+def competitors_payload(state, emb_version, brand, k=10):
+    brand_sim = state.brand_similarity(emb_version)
+    if brand_sim is None: return None
+    rivals = brand_sim.competitors(brand, k)
+    if rivals.empty: return None
+    return {'brand': brand, 'results': [{'brand': str(b), 'similarity': round(float(r.similarity), 4),
+                                         'perfumes': int(r.perfumes)} for b, r in rivals.iterrows()]}
+
+
+def pairings_payload(state, note, filter_mode=SCOPES[0], k=10):
+    pairs = state.note_matrix(filter_mode).pairings(note, k)
+    if pairs.empty: return None
+    return {'note': note, 'scope': filter_mode,
+            'results': [{'note': str(n), 'count': int(r['count']), 'share': round(float(r['share']), 4),
+                         'lift': round(float(r['lift']), 4)} for n, r in pairs.iterrows()]}
+
+
+def search_payload(state, emb_version, query, k=10):
+    """Hybrid keyword + vector search.
+
+    Keyword only without embeddings, and while the sentence model is still
+    loading (or failed to load), like the dashboard; `mode` says which ran.
+    """
+    similarity = state.similarity(emb_version)
+    encoder = query_encoder(similarity[3]) if similarity is not None else None
+    if encoder is not None and model_ready(encoder.model_name):
+        engine, _, item_to_catalog, _ = similarity
+        rows, scores, _ = hybrid_search(query, state.keyword_index(), engine, encoder, item_to_catalog, k=k)
+        mode = 'hybrid'
+    else:
+        rows, scores, _ = hybrid_search(query, state.keyword_index(), k=k)
+        mode = 'keyword'
+    return {'query': query, 'mode': mode,
+            'results': [_perfume(state.df, r, score=round(float(s), 5)) for r, s in zip(rows, scores)]}
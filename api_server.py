@@ -0,0 +1,280 @@
+"""
+Local JSON API over the dashboard's analytics (asyncio, standard library only).
+
+One in-memory dataset (analytics.CatalogState) is shared by every connection.
+Responses are cached per (dataset version, embedding version, request), so a
+refreshed dataset or embedding store never serves stale JSON; misses are
+computed on a worker thread and identical concurrent misses share one
+computation. HTTP/1.1 keep-alive, GET only.
+
+    python api_server.py --port 8000
+    curl 'localhost:8000/brands/Chanel?scope=fine'
+
+Routes (scope = all | fine, k/n = number of results):
+    /health
+    /brands/{brand}?scope=
+    /top/{brands|families|years|words|notes}?scope=&n=
+    /pairings/{note}?scope=&k=
+    /competitors/{brand}?k=
+    /similar/{row}?k=
+    /search?q=&k=
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit, parse_qsl
+
+import analytics
+from analytics import CatalogState, DATA_FILE, SCOPES, TOP_TABLES
+from dataset_watcher import DatasetWatcher, RELOAD_INTERVAL
+from embedding_store import embedding_version
+
+# --- CONFIGURATION ---
+RESPONSE_CACHE_SIZE = 20_000  # JSON bodies kept per process (a few KB each)
+MAX_RESULTS = 100
+SCOPE_NAMES = {'all': SCOPES[0], 'fine': SCOPES[1]}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# --- 1. RESPONSE CACHE ---
+class ResponseCache:
+    """Bounded LRU of encoded responses; concurrent misses for one key share one build."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = self.misses = 0
+
+    async def get(self, key, build):
+        """(status, body, hit); build() runs on the default executor and returns (status, body, cacheable)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry + (True,)
+        future = self._inflight.get(key)
+        hit = future is not None
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            future = self._inflight[key] = asyncio.get_running_loop().run_in_executor(None, build)
+            future.add_done_callback(lambda done: self._store(key, done))
+        # Shielded: a client that disconnects must not cancel the build other requests wait on
+        status, body, _ = await asyncio.shield(future)
+        return status, body, hit
+
+    def _store(self, key, future):
+        del self._inflight[key]
+        if future.cancelled() or future.exception() is not None: return
+        status, body, cacheable = future.result()
+        if not cacheable: return
+        self._entries[key] = (status, body)
+        if len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# --- 2. ROUTES ---
+def _int(params, name, default, high=MAX_RESULTS):
+    try: value = int(params.get(name, default))
+    except ValueError: raise BadRequest(f"{name} must be an integer")
+    if not 1 <= value <= high: raise BadRequest(f"{name} must be between 1 and {high}")
+    return value
+
+
+def _scope(params):
+    scope = params.get('scope', 'all')
+    if scope not in SCOPE_NAMES: raise BadRequest(f"scope must be one of {', '.join(SCOPE_NAMES)}")
+    return SCOPE_NAMES[scope]
+
+
+def route(parts, params):
+    """Normalized request: (name, args) with defaults filled in, so equal queries share a cache entry."""
+    name, rest = (parts[0], parts[1:]) if parts else ('', [])
+    if name == 'health' and not rest: return 'health', ()
+    if name == 'brands' and len(rest) == 1: return 'brands', (rest[0], _scope(params))
+    if name == 'top' and len(rest) == 1 and rest[0] in TOP_TABLES:
+        return 'top', (rest[0], _scope(params), _int(params, 'n', 15))
+    if name == 'pairings' and len(rest) == 1: return 'pairings', (rest[0], _scope(params), _int(params, 'k', 10))
+    if name == 'competitors' and len(rest) == 1: return 'competitors', (rest[0], _int(params, 'k', 10))
+    if name == 'similar' and len(rest) == 1:
+        if not (rest[0].isascii() and rest[0].isdigit()): raise BadRequest("row must be a catalog row number")
+        return 'similar', (int(rest[0]), _int(params, 'k', 10))
+    if name == 'search' and not rest:
+        query = params.get('q', '').strip()
+        if not query: raise BadRequest("q is required")
+        return 'search', (query, _int(params, 'k', 10))
+    return None
+
+
+def payload(state, emb_version, name, args):
+    if name == 'brands': return analytics.brand_payload(state, *args)
+    if name == 'top': return analytics.top_payload(state, *args)
+    if name == 'pairings': return analytics.pairings_payload(state, *args)
+    if name == 'competitors': return analytics.competitors_payload(state, emb_version, *args)
+    if name == 'similar': return analytics.similar_payload(state, emb_version, *args)
+    if name == 'search': return analytics.search_payload(state, emb_version, *args)
+
+
+def encode(status, body):
+    return status, json.dumps(body, ensure_ascii=False).encode()
+
+
+def parse_head(head):
+    """(method, target, keep_alive, content_length) of a request head; BadRequest if malformed."""
+    lines = head.decode('latin-1').split('\r\n')
+    try: method, target, http_version = lines[0].split(' ')
+    except ValueError: raise BadRequest("malformed request line")
+    headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+    headers = {k.strip().lower(): v.strip().lower() for k, v in headers.items()}
+    length = headers.get('content-length', '0') or '0'
+    if not (length.isascii() and length.isdigit()): raise BadRequest("invalid Content-Length")
+    keep_alive = headers.get('connection', 'keep-alive' if http_version == 'HTTP/1.1' else 'close') != 'close'
+    return method, target, keep_alive, int(length)
+
+
+async def send(writer, status, body, hit, keep_alive):
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(body)}\r\nX-Cache: {'hit' if hit else 'miss'}\r\n"
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+# --- 3. SERVER ---
+class AnalyticsServer:
+    """Keeps the live CatalogState and answers requests against it.
+
+    The dataset watcher warms a new version on its thread and then swaps it in;
+    the embedding version is re-checked on the same interval. Each request reads
+    both versions once, so it never mixes two releases.
+    """
+
+    def __init__(self, data_file=DATA_FILE, cache_size=RESPONSE_CACHE_SIZE, interval=RELOAD_INTERVAL):
+        self.data_file = data_file
+        self.interval = interval
+        self.cache = ResponseCache(cache_size)
+        self.states = {}
+        self.emb_version = embedding_version()
+        self._lock = threading.Lock()
+        self.watcher = DatasetWatcher(data_file, self.warm, interval)
+        self.warm(self.watcher.version)
+        self.started = time.time()
+
+    def warm(self, version):
+        state = CatalogState(version, self.data_file, self.states.get(self.watcher.version))
+        state.warm(self.emb_version)
+        with self._lock:
+            self.states[version] = state
+            for old in [v for v in self.states if v not in (version, self.watcher.version)]:
+                del self.states[old]  # Keep the live and the incoming version only
+
+    @property
+    def state(self):
+        return self.states[self.watcher.version]
+
+    async def refresh_embeddings(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            candidate = embedding_version()
+            if candidate != self.emb_version:
+                await loop.run_in_executor(None, self.state.brand_similarity, candidate)
+                self.emb_version = candidate
+                print(f"[INFO] Embedding version {candidate} is live")
+
+    def health(self):
+        return {'status': 'ok', 'version': self.watcher.version, 'embedding_version': self.emb_version,
+                'rows': len(self.state.df), 'uptime_s': round(time.time() - self.started, 1),
+                'cache': self.cache.stats()}
+
+    async def respond(self, method, target):
+        if method != 'GET': return 405, json.dumps({'error': 'GET only'}).encode(), False
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        try:
+            request = route(parts, dict(parse_qsl(url.query)))
+        except BadRequest as e:
+            return encode(400, {'error': str(e)}) + (False,)
+        if request is None: return encode(404, {'error': 'unknown route'}) + (False,)
+        if request[0] == 'health': return encode(200, self.health()) + (False,)
+
+        state, emb_version = self.state, self.emb_version
+
+        def build():
+            # Errors are retried, not cached; neither is a keyword-only search the model could still improve
+            try: body = payload(state, emb_version, *request)
+            except Exception as e: return encode(500, {'error': str(e)}) + (False,)
+            if body is None: return encode(404, {'error': 'not found'}) + (True,)
+            degraded = body.get('mode') == 'keyword' and state.similarity(emb_version) is not None
+            return encode(200, body) + (not degraded,)
+
+        return await self.cache.get((state.version, emb_version) + request, build)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try: head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError): break
+                try:
+                    method, target, keep_alive, length = parse_head(head)
+                except BadRequest as e:
+                    # The body framing is unknown, so the connection cannot be reused
+                    await send(writer, *encode(400, {'error': str(e)}), False, False)
+                    break
+                if length:
+                    try: await reader.readexactly(length)  # No request bodies are used; discard
+                    except asyncio.IncompleteReadError: break
+
+                status, body, hit = await self.respond(method, target)
+                await send(writer, status, body, hit, keep_alive)
+                if not keep_alive: break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        self.watcher.start()
+        asyncio.ensure_future(self.refresh_embeddings())
+        print(f"[INFO] Serving dataset version {self.watcher.version} on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Aromo analytics as a local JSON API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data-file', default=DATA_FILE, help="Dataset CSV (snapshot built by 1_data_pipeline.py)")
+    parser.add_argument('--cache-size', type=int, default=RESPONSE_CACHE_SIZE, help="Cached responses")
+    parser.add_argument('--workers', type=int, default=min(8, (os.cpu_count() or 1) + 2), help="Threads for cache misses")
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL, help="Seconds between dataset checks")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = AnalyticsServer(args.data_file, args.cache_size, args.reload_interval)
+    print(f"[INFO] Dataset loaded and warmed in {time.perf_counter() - start:.1f}s ({len(server.state.df):,} rows)")
+
+    async def run():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(args.workers, thread_name_prefix='api'))
+        await server.serve(args.host, args.port)
+
+    try: asyncio.run(run())
+    except KeyboardInterrupt: print("[INFO] Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from collections import Counter
-import re
 import os
+import threading
+from profiler import PROFILER
 
 # --- 1. CONFIGURATION ---
 st.set_page_config(
@@ -12,9 +10,10 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+with PROFILER.block('app.rerun'): # Whole rerun, also when st.stop() or a widget change interrupts it; see the ?debug=1 panel
 
-# --- 2. LUXURY DARK CSS (FIXED DROPDOWN) ---
-st.markdown("""
+    # --- 2. LUXURY DARK CSS (FIXED DROPDOWN) ---
+    st.markdown("""
     <style>
     @import url('https://fonts.googleapis.com/css2?family=Cormorant+Garamond:ital,wght@0,300;0,400;0,600;1,400&family=Montserrat:wght@300;400;500;600;700&display=swap');
     
@@ -133,93 +132,18 @@ st.markdown("""
     .custom-footer { text-align: center; margin-top: 100px; padding-top: 40px; border-top: 1px solid #333; color: #666; font-size: 0.75rem; letter-spacing: 1px; line-height: 1.8; }
     .footer-link { color: #D4AF37; text-decoration: none; border-bottom: 1px dotted #D4AF37; }
     
-    /* TAB CENTERING HACK */
-    .stTabs [data-baseweb="tab-list"] { justify-content: center; }
+    /* VIEW SWITCH CENTERING HACK */
+    .stRadio div[role="radiogroup"] { justify-content: center; }
     
     </style>
     """, unsafe_allow_html=True)
 
-# --- 3. DATA ENGINE ---
-@st.cache_data(ttl=0)
-def load_data():
-    file_path = 'aromo_english.csv'
-    if not os.path.exists(file_path): return pd.DataFrame(), "FILE_NOT_FOUND"
-
-    try:
-        # Explicit comma separator
-        df = pd.read_csv(file_path, sep=',', on_bad_lines='skip', engine='python')
-        df.columns = df.columns.str.lower().str.strip()
-        df = df.dropna(subset=['brand'])
-        
-        # Clean Data
-        df['Brand'] = df['brand'].astype(str).str.strip().str.lstrip("#*-").str.title()
-        df['display_name'] = df['name'].astype(str).str.strip() if 'name' in df.columns else "Unknown"
-        df['Type_Raw'] = df['type'].astype(str).str.strip() if 'type' in df.columns else "Fragrance"
-        
-        # Year
-        if 'year' in df.columns:
-            df['year_clean'] = pd.to_numeric(df['year'], errors='coerce').fillna(0).astype(int)
-        else: df['year_clean'] = 0
-            
-        # Segment
-        df['Segment_Raw'] = df['segment'].astype(str) if 'segment' in df.columns else "Unknown"
-
-        # Families
-        if 'families' in df.columns:
-            df['families'] = df['families'].astype(str).replace('nan', 'Unknown')
-            df['Main_Fam'] = df['families'].apply(lambda x: x.split(',')[0].strip().title().replace("['", "").replace("']", "") if isinstance(x, str) else "Unknown")
-        else: df['Main_Fam'] = "Unknown"
-            
-        # Notes
-        if 'top_notes' in df.columns:
-            df['notes_display'] = df['top_notes'].astype(str).replace('nan', '').apply(lambda x: x[:60] + "..." if len(x) > 60 else x)
-            df['notes_list'] = df['top_notes'].astype(str).replace('nan', '').apply(lambda x: [i.strip() for i in x.split(',') if i.strip()])
-        else:
-            df['notes_display'] = ""; df['notes_list'] = [[] for _ in range(len(df))]
-            
-        df['url'] = df['url'] if 'url' in df.columns else "#"
-        return df, "OK"
-    except Exception as e: return pd.DataFrame(), str(e)
-
-def get_initials(text):
-    if not isinstance(text, str): return "SC"
-    words = text.replace("'", "").split()
-    return (words[0][0] + words[1][0]).upper() if len(words) >= 2 else words[0][:2].upper()
-
-# --- 4. EXECUTE LOAD ---
-df, status = load_data()
-
-# --- 5. SIDEBAR ---
-with st.sidebar:
+    # --- 3. HEADER ---
+    # Painted before the data engine below is imported or loaded, so the page shows up at once
+    st.markdown("<h1>AROMO INTELLIGENCE</h1>", unsafe_allow_html=True)
+
+    # --- ADDED: INTRO DESCRIPTION ---
     st.markdown("""
-    <div style='text-align:center; color:#D4AF37; font-family:"Cormorant Garamond"; font-size:1.5rem; margin-bottom:20px; border-bottom:1px solid #333; padding-bottom:10px;'>
-    ATELIER SETTINGS
-    </div>
-    """, unsafe_allow_html=True)
-    
-    if not df.empty:
-        st.success(f"DATABASE ONLINE\n{len(df):,} Records")
-        st.markdown("---")
-        filter_mode = st.radio("SCOPE", ["All Products", "Fine Fragrance Only"])
-        
-        # --- FIX: FILTERING LOGIC (METRICS will now change) ---
-        if filter_mode == "Fine Fragrance Only":
-            mask = df['Type_Raw'].str.contains('Parfum|Toilette|Cologne|EdP|EdT', case=False, na=False)
-            df_filtered = df[mask].copy()
-        else: 
-            df_filtered = df.copy()
-            
-        df_brand_view = df_filtered.copy() # Use this for Brand Tab
-    else:
-        st.error(f"Status: {status}")
-        df_filtered = pd.DataFrame()
-        df_brand_view = pd.DataFrame()
-
-# --- 6. HEADER ---
-st.markdown("<h1>AROMO INTELLIGENCE</h1>", unsafe_allow_html=True)
-
-# --- ADDED: INTRO DESCRIPTION ---
-st.markdown("""
 <div class="intro-text">
     Welcome to the <b>Aromo Intelligence Atelier</b>. This interactive dashboard provides a deep-dive analysis 
     of the global fragrance market. Explore trends, analyze brand portfolios, and discover the olfactory DNA 
@@ -227,63 +151,192 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-if df.empty: st.stop()
+    # --- 4. DATA ENGINE ---
+    # pandas, pyarrow, scipy and plotly are imported here, after the header is on screen;
+    # only the first rerun of the process pays for them, later ones find them in sys.modules.
+    with PROFILER.block('app.imports'):
+        import pandas as pd
+        from analytics import CatalogState, DATA_FILE, SCOPES, query_encoder
+        from data_engine import brand_profile
+        from embedding_store import embedding_version
+        from semantic_search import hybrid_search, model_error, model_ready
+        from charts import FigureCache, brand_figures, competitor_figures, global_figures, note_figures, warm_up
+        from dataset_watcher import DatasetWatcher, RELOAD_INTERVAL
+
+    # cache_resource hands every session the same object (no per-rerun unpickled copy),
+    # so nothing below may modify these frames in place.
+    # Every data cache is keyed by the dataset version: a refreshed CSV gets fresh entries,
+    # and max_entries keeps at most the live and the previous version in memory.
+    @st.cache_resource(max_entries=2)
+    def load_state(version, _previous=None):
+        # Data, scopes, cubes, note matrices and search indexes of one dataset version (see analytics.py),
+        # built lazily on first use and shared with every session; _previous (not hashed) is the state it replaces
+        return CatalogState(version, DATA_FILE, _previous)
+
+    @st.cache_resource
+    def load_figure_cache():
+        # Bounded LRU of built figures per ((version, scope), brand); old versions age out
+        return FigureCache()
 
-# METRICS (Using df_filtered to react to sidebar)
-c1, c2, c3 = st.columns(3)
-with c1: st.markdown(f'<div class="gold-metric"><div class="metric-label">Global Portfolio</div><div class="metric-value">{len(df_filtered):,}</div></div>', unsafe_allow_html=True)
-with c2: st.markdown(f'<div class="gold-metric"><div class="metric-label">Unique Brands</div><div class="metric-value">{df_filtered["Brand"].nunique():,}</div></div>', unsafe_allow_html=True)
-with c3: st.markdown(f'<div class="gold-metric"><div class="metric-label">Olfactory Families</div><div class="metric-value">{df_filtered["Main_Fam"].nunique():,}</div></div>', unsafe_allow_html=True)
+    def warm_dataset(version, top_n=0, previous=None):
+        # Builds every cache of a version before sessions switch to it (no cold-cache stampede)
+        state = load_state(version, load_state(previous) if previous is not None else None)
+        try:
+            state.warm(embedding_version())
+        except Exception:
+            load_state.clear(version) # A version that never goes live must not evict the live state from the cache
+            raise
+        if top_n > 0: warm_up(load_figure_cache(), {(version, mode): state.cube(mode) for mode in SCOPES}, top_n)
 
-st.markdown("<br>", unsafe_allow_html=True)
+    @st.cache_resource
+    def load_watcher():
+        # Hot reload: a new dataset file is warmed in the background, then swapped in atomically.
+        # AROMO_WARM_BRANDS=N also pre-renders the top N brands of every version.
+        top_n = int(os.environ.get('AROMO_WARM_BRANDS', '0') or 0)
+        interval = float(os.environ.get('AROMO_RELOAD_INTERVAL', RELOAD_INTERVAL))
+        watcher = DatasetWatcher(DATA_FILE, lambda version: warm_dataset(version, top_n, watcher.version), interval).start()
+        if top_n > 0:
+            threading.Thread(target=warm_dataset, args=(watcher.version, top_n), daemon=True).start()
+        return watcher
 
-# --- 7. TABS ---
-tab_brand, tab_global = st.tabs(["BRAND ANALYSIS", "GLOBAL MARKET"])
+    def plot(fig):
+        # Plotly serialization is timed separately from building the figures
+        with PROFILER.block('charts.serialize'): st.plotly_chart(fig, use_container_width=True)
 
-# =========================================================
-# TAB 1: BRAND ANALYSIS
-# =========================================================
-with tab_brand:
-    st.markdown("<h3>BRAND ANALYSIS</h3>", unsafe_allow_html=True) # Explicit centered header
+    def get_initials(text):
+        if not isinstance(text, str): return "SC"
+        words = text.replace("'", "").split()
+        return (words[0][0] + words[1][0]).upper() if len(words) >= 2 else words[0][:2].upper()
+
+    # --- 5. EXECUTE LOAD ---
+    # The version is read once, so this whole rerun sees one consistent dataset even if a swap lands midway
+    version = load_watcher().version
+    state = load_state(version)
+    emb_version = embedding_version()
+    with PROFILER.block('data.load'): df, status = state.data()
+
+    # --- 6. SIDEBAR ---
+    with st.sidebar:
+        st.markdown("""
+    <div style='text-align:center; color:#D4AF37; font-family:"Cormorant Garamond"; font-size:1.5rem; margin-bottom:20px; border-bottom:1px solid #333; padding-bottom:10px;'>
+    ATELIER SETTINGS
+    </div>
+    """, unsafe_allow_html=True)
     
-    if df_brand_view.empty:
-        st.warning("No data available.")
-    else:
-        brands = sorted(df_brand_view['Brand'].unique())
-        idx = brands.index("Tom Ford") if "Tom Ford" in brands else 0
+        if not df.empty:
+            st.success(f"DATABASE ONLINE\n{len(df):,} Records")
+            st.caption(f"Dataset version {version}")
+            st.markdown("---")
+            filter_mode = st.radio("SCOPE", SCOPES)
         
-        c_fill1, c_sel, c_fill2 = st.columns([1, 2, 1])
-        with c_sel:
-            st.markdown("<div style='text-align:center; color:#D4AF37; font-size:0.8rem; letter-spacing:2px; margin-bottom:5px;'>SELECT MAISON</div>", unsafe_allow_html=True)
-            sel_brand = st.selectbox("Brand", brands, index=idx, label_visibility="collapsed")
+            # --- FIX: FILTERING LOGIC (METRICS will now change) ---
+            with PROFILER.block('data.scope'): df_filtered = state.scope(filter_mode) # Shared read-only view, also used by Brand Tab
+        else:
+            st.error(f"Status: {status}")
+            df_filtered = pd.DataFrame()
+
+    if df.empty: st.stop()
 
-        b_df = df_brand_view[df_brand_view['Brand'] == sel_brand]
+    # Precomputed counts for the selected scope
+    with PROFILER.block('data.cube'): cube = state.cube(filter_mode)
+
+    # METRICS (Using the scope cube to react to sidebar)
+    c1, c2, c3 = st.columns(3)
+    with c1: st.markdown(f'<div class="gold-metric"><div class="metric-label">Global Portfolio</div><div class="metric-value">{cube["n_rows"]:,}</div></div>', unsafe_allow_html=True)
+    with c2: st.markdown(f'<div class="gold-metric"><div class="metric-label">Unique Brands</div><div class="metric-value">{len(cube["brand_counts"]):,}</div></div>', unsafe_allow_html=True)
+    with c3: st.markdown(f'<div class="gold-metric"><div class="metric-label">Olfactory Families</div><div class="metric-value">{len(cube["family_counts"]):,}</div></div>', unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # --- SCENT SEARCH (keyword index + embeddings from 2_ai_engine.py when available) ---
+    similarity = state.similarity(emb_version)
+    # The first call starts loading the sentence model on a background thread, before anyone searches
+    encoder = query_encoder(similarity[3]) if similarity is not None else None
+    st.markdown("<h3>SCENT SEARCH</h3>", unsafe_allow_html=True)
+    c_fill1, c_query, c_fill2 = st.columns([1, 2, 1])
+    with c_query:
+        query = st.text_input("Search", placeholder="Describe a scent, e.g. smoky vanilla oud", label_visibility="collapsed")
+    if query.strip():
+        with PROFILER.block('search.query'):
+            if encoder is not None and model_ready(encoder.model_name):
+                engine, catalog_to_item, item_to_catalog, model_name = similarity
+                rows, scores, timing = hybrid_search(query, state.keyword_index(), engine, encoder, item_to_catalog, k=9)
+            else: # No embeddings, or the model is still loading: keyword results only
+                rows, scores, timing = hybrid_search(query, state.keyword_index(), k=9)
+        if len(rows) == 0: st.info("No perfumes match this search.")
+        cols = st.columns(3)
+        for i, r in enumerate(rows):
+            match = df.iloc[r]
+            with cols[i % 3]:
+                st.markdown(f"""
+            <div class="perfume-card">
+                <div class="card-signature">{get_initials(match['display_name'])}</div>
+                <div class="card-title">{match['display_name']}</div>
+                <div class="card-meta">{match['Brand']} • {match['Main_Fam']}</div>
+                <div class="card-notes">{match['notes_display']}</div>
+                <a href="{match['url']}" target="_blank" class="gold-btn">VIEW PROFILE</a>
+            </div>
+            """, unsafe_allow_html=True)
+        timing_str = f"Keyword {timing['keyword_ms']:.1f} ms"
+        if 'encode_ms' in timing:
+            cache_str = "cached query" if timing['cached'] else "new query"
+            timing_str += f" • Encode {timing['encode_ms']:.1f} ms • Vector {timing['search_ms']:.1f} ms ({cache_str})"
+        if encoder is not None and 'encode_ms' not in timing:
+            error = model_error(encoder.model_name)
+            timing_str += f" • Semantic model unavailable ({error}), keyword matches only" if error else " • Semantic model still loading, keyword matches only"
+        st.markdown(f"<div class='chart-insight'>{timing_str}</div>", unsafe_allow_html=True)
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # --- 7. VIEWS ---
+    # A radio instead of st.tabs: tabs run every tab body on each rerun, so browsing brands
+    # kept recomputing the hidden global charts. Only the selected view executes now.
+    c_fill1, c_view, c_fill2 = st.columns([1, 2, 1])
+    with c_view:
+        view = st.radio("View", ["BRAND ANALYSIS", "GLOBAL MARKET", "NOTE PAIRINGS"], horizontal=True, label_visibility="collapsed")
+
+    # =========================================================
+    # TAB 1: BRAND ANALYSIS
+    # =========================================================
+    if view == "BRAND ANALYSIS":
+        st.markdown("<h3>BRAND ANALYSIS</h3>", unsafe_allow_html=True) # Explicit centered header
+    
+        if df_filtered.empty:
+            st.warning("No data available.")
+        else:
+            brands = sorted(cube['brand_counts'].index)
+            idx = brands.index("Tom Ford") if "Tom Ford" in brands else 0
         
-        # HEADER BOX
-        brand_init = get_initials(sel_brand)
-        seg_str = "ESTABLISHED HOUSE"
-        if 'Segment_Raw' in b_df.columns:
-            val = b_df['Segment_Raw'].iloc[0]
+            c_fill1, c_sel, c_fill2 = st.columns([1, 2, 1])
+            with c_sel:
+                st.markdown("<div style='text-align:center; color:#D4AF37; font-size:0.8rem; letter-spacing:2px; margin-bottom:5px;'>SELECT MAISON</div>", unsafe_allow_html=True)
+                sel_brand = st.selectbox("Brand", brands, index=idx, label_visibility="collapsed")
+
+            with PROFILER.block('brand.profile'): profile = brand_profile(cube, sel_brand)
+        
+            # HEADER BOX
+            brand_init = get_initials(sel_brand)
+            seg_str = "ESTABLISHED HOUSE"
+            val = profile['segment']
             if pd.notna(val) and str(val) != 'nan': seg_str = str(val).upper()
 
-        st.markdown(f"""
+            st.markdown(f"""
         <div class="brand-signature-box">
             <div class="brand-main-emblem">{brand_init}</div>
             <div style="font-family:'Cormorant Garamond'; font-size:3rem; color:#FFF; margin-bottom:10px;">{sel_brand}</div>
-            <div style="font-family:'Montserrat'; font-size:0.8rem; color:#D4AF37; letter-spacing:3px;">{len(b_df)} CREATIONS • {seg_str}</div>
+            <div style="font-family:'Montserrat'; font-size:0.8rem; color:#D4AF37; letter-spacing:3px;">{profile['count']} CREATIONS • {seg_str}</div>
         </div>
         """, unsafe_allow_html=True)
         
-        # LATEST RELEASES (WITH SIGNATURE)
-        st.markdown("<h3>LATEST RELEASES</h3>", unsafe_allow_html=True)
-        if not b_df.empty:
-            top_scents = b_df.sort_values('year_clean', ascending=False).head(4)
-            cols = st.columns(2)
-            for i, (idx, row) in enumerate(top_scents.iterrows()):
-                year_str = str(row['year_clean']) if row['year_clean'] > 0 else "N/A"
-                initials = get_initials(row['display_name'])
-                with cols[i % 2]: 
-                    st.markdown(f"""
+            # LATEST RELEASES (WITH SIGNATURE)
+            st.markdown("<h3>LATEST RELEASES</h3>", unsafe_allow_html=True)
+            if profile['count']:
+                top_scents = profile['latest']
+                cols = st.columns(2)
+                for i, (idx, row) in enumerate(top_scents.iterrows()):
+                    year_str = str(row['year_clean']) if row['year_clean'] > 0 else "N/A"
+                    initials = get_initials(row['display_name'])
+                    with cols[i % 2]: 
+                        st.markdown(f"""
                     <div class="perfume-card">
                         <div class="card-signature">{initials}</div>
                         <div class="card-title">{row['display_name']}</div>
@@ -293,199 +346,142 @@ with tab_brand:
                     </div>
                     """, unsafe_allow_html=True)
 
-        # --- TIMELINE ---
-        st.markdown("<h3>ACTIVITY TIMELINE (MODERN ERA)</h3>", unsafe_allow_html=True)
-        if not b_df.empty:
-            timeline_series = b_df[b_df['year_clean'] >= 2000]['year_clean'].value_counts().sort_index()
-            
-            if not timeline_series.empty:
-                x_vals = timeline_series.index.astype(str).tolist()
-                y_vals = timeline_series.values.tolist()
-                max_y = max(y_vals)
-
-                fig_time = go.Figure(go.Bar(
-                    x=x_vals, y=y_vals,
-                    text=y_vals,
-                    textposition='outside', # Value on top
-                    texttemplate='%{y}',    # Force Y value
-                    cliponaxis=False,
-                    marker_color='#D4AF37',
-                    textfont=dict(color='white', size=14, weight='bold')
-                ))
-                fig_time.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=450,
-                    xaxis=dict(showgrid=False, title="", type='category'),
-                    yaxis=dict(showgrid=True, gridcolor='#333', title="", range=[0, max_y * 1.4]),
-                    margin=dict(t=50, b=40)
-                )
-                st.plotly_chart(fig_time, use_container_width=True)
-            else: st.info("No releases found after year 2000.")
-
-        st.markdown("<br>", unsafe_allow_html=True)
-
-        # DNA & INGREDIENTS
-        c_dna, c_ing = st.columns(2)
-        with c_dna:
-            st.markdown("<h3>OLFACTORY DNA</h3>", unsafe_allow_html=True)
-            fam_series = b_df['Main_Fam'].value_counts().head(8).sort_values(ascending=True)
-            
-            if not fam_series.empty:
-                x_vals = fam_series.values.tolist()
-                y_vals = fam_series.index.tolist()
-                max_x = max(x_vals)
-                
-                fig_dna = go.Figure(go.Bar(
-                    x=x_vals, y=y_vals, orientation='h',
-                    text=x_vals,
-                    textposition='outside',
-                    texttemplate='%{x}',
-                    cliponaxis=False,
-                    marker_color='#D4AF37', textfont=dict(color='white', size=14, weight='bold')
-                ))
-                fig_dna.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=500,
-                    xaxis=dict(showgrid=False, visible=False, range=[0, max_x * 1.5]), # 50% Space
-                    yaxis=dict(tickfont=dict(color='#E0E0E0', size=12)),
-                    margin=dict(r=180) # HUGE RIGHT MARGIN
-                )
-                st.plotly_chart(fig_dna, use_container_width=True)
-
-        with c_ing:
-            st.markdown("<h3>SIGNATURE INGREDIENTS</h3>", unsafe_allow_html=True)
-            all_n = [x for sub in b_df['notes_list'] for x in sub]
-            if all_n:
-                top_n = pd.Series(Counter(all_n)).sort_values(ascending=False).head(8).sort_values(ascending=True)
-                x_vals = top_n.values.tolist()
-                y_vals = top_n.index.tolist()
-                max_x = max(x_vals)
-                
-                fig_ing = go.Figure(go.Bar(
-                    x=x_vals, y=y_vals, orientation='h',
-                    text=x_vals,
-                    textposition='outside',
-                    texttemplate='%{x}',
-                    cliponaxis=False, 
-                    marker_color='#B8860B', textfont=dict(color='white', size=14, weight='bold')
-                ))
-                fig_ing.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=500,
-                    xaxis=dict(showgrid=False, visible=False, range=[0, max_x * 1.5]),
-                    yaxis=dict(tickfont=dict(color='#E0E0E0', size=12)),
-                    margin=dict(r=180) # HUGE RIGHT MARGIN
-                )
-                st.plotly_chart(fig_ing, use_container_width=True)
-
-# =========================================================
-# TAB 2: GLOBAL MARKET
-# =========================================================
-with tab_global:
-    st.markdown("<h3>GLOBAL MARKET TRENDS</h3>", unsafe_allow_html=True)
-    # --- FIX: GREY TEXT (REPLACED ST.INFO) ---
-    st.markdown("<div class='chart-insight'>Analysis based on full dataset (78,000+ records).</div>", unsafe_allow_html=True)
-
-    # 1. TOP BRANDS
-    st.markdown("<h3>TOP 15 BRANDS (VOLUME)</h3>", unsafe_allow_html=True)
-    brand_series = df_filtered['Brand'].value_counts().head(15).sort_values(ascending=True)
-    
-    # RAW LIST EXTRACTION TO PREVENT PANDAS INDEX ERRORS
-    y_labels = brand_series.index.tolist()
-    x_values = brand_series.values.tolist()
-    max_val = max(x_values)
-    
-    fig1 = go.Figure(go.Bar(
-        x=x_values, y=y_labels, orientation='h',
-        text=x_values, 
-        textposition='outside',
-        texttemplate='%{x}', # Force X value
-        cliponaxis=False,
-        marker_color='#D4AF37', textfont=dict(color='white', size=14, weight='bold')
-    ))
-    fig1.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=600, 
-        xaxis=dict(showgrid=False, visible=False, range=[0, max_val * 1.4]), 
-        yaxis=dict(tickfont=dict(color='#E0E0E0', size=12)), margin=dict(r=180)
-    )
-    st.plotly_chart(fig1, use_container_width=True)
-    st.markdown("<div class='chart-insight'>Brands with the largest number of releases.</div>", unsafe_allow_html=True)
-
-    # 2. FAMILIES
-    st.markdown("<h3>TOP OLFACTORY FAMILIES</h3>", unsafe_allow_html=True)
-    fam_series = df_filtered['Main_Fam'].value_counts().head(15)
-    if 'Unknown' in fam_series: fam_series = fam_series.drop('Unknown')
-    fam_series = fam_series.sort_values(ascending=True)
-    
-    y_labels = fam_series.index.tolist()
-    x_values = fam_series.values.tolist()
-    max_val = max(x_values)
-    
-    fig2 = go.Figure(go.Bar(
-        x=x_values, y=y_labels, orientation='h',
-        text=x_values, 
-        textposition='outside',
-        texttemplate='%{x}',
-        cliponaxis=False,
-        marker_color='#B8860B', textfont=dict(color='white', size=14, weight='bold')
-    ))
-    fig2.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=600,
-        xaxis=dict(showgrid=False, visible=False, range=[0, max_val * 1.4]),
-        yaxis=dict(tickfont=dict(color='#E0E0E0', size=12)), margin=dict(r=180)
-    )
-    st.plotly_chart(fig2, use_container_width=True)
-    st.markdown("<div class='chart-insight'>Most popular fragrance families.</div>", unsafe_allow_html=True)
-
-    # 3. YEARS
-    st.markdown("<h3>LAUNCH HISTORY (TOP 15 YEARS)</h3>", unsafe_allow_html=True)
-    year_series = df_filtered[(df_filtered['year_clean'] > 1990) & (df_filtered['year_clean'] <= 2026)]['year_clean'].value_counts().head(15).sort_index(ascending=True)
-    
-    x_cats = year_series.index.astype(str).tolist()
-    y_vals = year_series.values.tolist()
-    max_val = max(y_vals)
-    
-    fig3 = go.Figure(go.Bar(
-        x=x_cats, y=y_vals,
-        text=y_vals, 
-        textposition='outside',
-        texttemplate='%{y}',
-        cliponaxis=False,
-        marker_color='#A0522D', textfont=dict(color='white', size=14, weight='bold')
-    ))
-    fig3.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=500,
-        xaxis=dict(showgrid=False, title="", type='category'),
-        yaxis=dict(showgrid=False, visible=False, range=[0, max_val * 1.4]),
-        margin=dict(t=50)
-    )
-    st.plotly_chart(fig3, use_container_width=True)
-    st.markdown("<div class='chart-insight'>Most active years for new perfume launches.</div>", unsafe_allow_html=True)
-
-    # 4. WORDS
-    st.markdown("<h3>MOST POPULAR NAME WORDS</h3>", unsafe_allow_html=True)
-    text_data = " ".join(df_filtered['display_name'].dropna().astype(str))
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text_data.lower())
-    stop_words = set(['eau', 'de', 'parfum', 'toilette', 'cologne', 'the', 'le', 'la', 'les', 'for', 'men', 'women', 'pour', 'homme', 'femme', 'intense', 'elixir', 'and', 'of', 'in', 'to', 'a', 'by', 'no', 'vol', 'ml', 'edp', 'edt', 'spray', 'water', 'collection', 'edition', 'unknown'])
-    filtered = [w.capitalize() for w in words if w not in stop_words]
-    
-    word_series = pd.Series(Counter(filtered)).sort_values(ascending=False).head(15).sort_values(ascending=True)
-    y_labels = word_series.index.tolist()
-    x_values = word_series.values.tolist()
-    max_val = max(x_values)
-    
-    fig_w = go.Figure(go.Bar(
-        x=x_values, y=y_labels, orientation='h',
-        text=x_values, 
-        textposition='outside',
-        texttemplate='%{x}',
-        cliponaxis=False,
-        marker_color='#B8860B', textfont=dict(color='white', size=14, weight='bold')
-    ))
-    fig_w.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=600,
-        xaxis=dict(showgrid=False, visible=False, range=[0, max_val * 1.4]),
-        yaxis=dict(tickfont=dict(color='#E0E0E0', size=12)), margin=dict(r=180)
-    )
-    st.plotly_chart(fig_w, use_container_width=True)
-    st.markdown("<div class='chart-insight'>Common keywords found in perfume names.</div>", unsafe_allow_html=True)
+            # SIMILAR FRAGRANCES (only when the embedding store from 2_ai_engine.py exists)
+            similarity = state.similarity(emb_version)
+            if profile['count'] and similarity is not None:
+                engine, catalog_to_item, item_to_catalog, _ = similarity
+                st.markdown("<h3>SIMILAR FRAGRANCES</h3>", unsafe_allow_html=True)
+                c_fill1, c_pick, c_fill2 = st.columns([1, 2, 1])
+                with c_pick:
+                    pick = st.selectbox("Perfume", top_scents['row'].tolist(), label_visibility="collapsed",
+                                        format_func=lambda r: df.at[r, 'display_name'])
+                item = catalog_to_item[pick]
+                if item >= 0:
+                    with PROFILER.block('brand.similar'):
+                        ids, scores = engine.similar_to(item, k=6, approximate=engine.centroids is not None)
+                    cols = st.columns(3)
+                    for i, (r, score) in enumerate(zip(item_to_catalog[ids], scores)):
+                        match = df.iloc[r]
+                        with cols[i % 3]:
+                            st.markdown(f"""
+                        <div class="perfume-card">
+                            <div class="card-signature">{get_initials(match['display_name'])}</div>
+                            <div class="card-title">{match['display_name']}</div>
+                            <div class="card-meta">{match['Brand']} • {score:.0%} MATCH</div>
+                            <a href="{match['url']}" target="_blank" class="gold-btn">VIEW PROFILE</a>
+                        </div>
+                        """, unsafe_allow_html=True)
+                else: st.info("No embedding available for this perfume.")
+
+            # CLOSEST COMPETITORS (brand centroids of the same embeddings)
+            with PROFILER.block('brand.competitors'):
+                brand_sim = state.brand_similarity(emb_version)
+                comp_figs = None
+                if profile['count'] and brand_sim is not None:
+                    comp_figs = load_figure_cache().get(((version, emb_version), ('competitors', sel_brand)),
+                                                        lambda: competitor_figures(brand_sim, sel_brand))
+            if comp_figs is not None:
+                st.markdown("<h3>CLOSEST COMPETITORS</h3>", unsafe_allow_html=True)
+                if comp_figs['competitors'] is not None:
+                    c_comp, c_map = st.columns(2)
+                    with c_comp: plot(comp_figs['competitors'])
+                    with c_map: plot(comp_figs['map'])
+                    st.markdown("<div class='chart-insight'>Houses whose average perfume embedding is closest (similarity %), and where they sit on the brand map.</div>", unsafe_allow_html=True)
+                else: st.info("No embeddings available for this brand.")
+
+            # Pre-built figures for this (scope, brand), shared across sessions
+            with PROFILER.block('brand.figures'):
+                figs = load_figure_cache().get(((version, filter_mode), sel_brand), lambda: brand_figures(profile))
+
+            # --- TIMELINE ---
+            st.markdown("<h3>ACTIVITY TIMELINE (MODERN ERA)</h3>", unsafe_allow_html=True)
+            if profile['count']:
+                if figs['timeline'] is not None: plot(figs['timeline'])
+                else: st.info("No releases found after year 2000.")
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            # DNA & INGREDIENTS
+            c_dna, c_ing = st.columns(2)
+            with c_dna:
+                st.markdown("<h3>OLFACTORY DNA</h3>", unsafe_allow_html=True)
+                if figs['dna'] is not None: plot(figs['dna'])
+
+            with c_ing:
+                st.markdown("<h3>SIGNATURE INGREDIENTS</h3>", unsafe_allow_html=True)
+                if figs['ingredients'] is not None: plot(figs['ingredients'])
+
+    # =========================================================
+    # TAB 2: GLOBAL MARKET
+    # =========================================================
+    elif view == "GLOBAL MARKET":
+        st.markdown("<h3>GLOBAL MARKET TRENDS</h3>", unsafe_allow_html=True)
+        # --- FIX: GREY TEXT (REPLACED ST.INFO) ---
+        st.markdown("<div class='chart-insight'>Analysis based on full dataset (78,000+ records).</div>", unsafe_allow_html=True)
+        with PROFILER.block('global.figures'):
+            global_figs = load_figure_cache().get(((version, filter_mode), None), lambda: global_figures(cube))
+
+        # 1. TOP BRANDS
+        st.markdown("<h3>TOP 15 BRANDS (VOLUME)</h3>", unsafe_allow_html=True)
+        if global_figs['brands'] is not None: plot(global_figs['brands'])
+        st.markdown("<div class='chart-insight'>Brands with the largest number of releases.</div>", unsafe_allow_html=True)
+
+        # 2. FAMILIES
+        st.markdown("<h3>TOP OLFACTORY FAMILIES</h3>", unsafe_allow_html=True)
+        if global_figs['families'] is not None: plot(global_figs['families'])
+        st.markdown("<div class='chart-insight'>Most popular fragrance families.</div>", unsafe_allow_html=True)
+
+        # 3. YEARS
+        st.markdown("<h3>LAUNCH HISTORY (TOP 15 YEARS)</h3>", unsafe_allow_html=True)
+        if global_figs['years'] is not None: plot(global_figs['years'])
+        st.markdown("<div class='chart-insight'>Most active years for new perfume launches.</div>", unsafe_allow_html=True)
+
+        # 4. WORDS
+        st.markdown("<h3>MOST POPULAR NAME WORDS</h3>", unsafe_allow_html=True)
+        if global_figs['words'] is not None: plot(global_figs['words'])
+        st.markdown("<div class='chart-insight'>Common keywords found in perfume names.</div>", unsafe_allow_html=True)
+
+    # =========================================================
+    # TAB 3: NOTE PAIRINGS
+    # =========================================================
+    elif view == "NOTE PAIRINGS":
+        st.markdown("<h3>NOTE PAIRINGS</h3>", unsafe_allow_html=True)
+        with PROFILER.block('notes.matrix'): matrix = state.note_matrix(filter_mode)
+        note_counts = matrix.top_notes()
+
+        if note_counts.empty:
+            st.warning("No notes available.")
+        else:
+            notes = note_counts.index.tolist()
+            idx = notes.index("oud") if "oud" in notes else 0
+
+            c_fill1, c_sel, c_fill2 = st.columns([1, 2, 1])
+            with c_sel:
+                st.markdown("<div style='text-align:center; color:#D4AF37; font-size:0.8rem; letter-spacing:2px; margin-bottom:5px;'>SELECT NOTE</div>", unsafe_allow_html=True)
+                sel_note = st.selectbox("Note", notes, index=idx, label_visibility="collapsed")
+            st.markdown(f"<div class='chart-insight'>{note_counts[sel_note]:,} perfumes list {sel_note}.</div>", unsafe_allow_html=True)
+
+            with PROFILER.block('notes.figures'):
+                note_figs = load_figure_cache().get(((version, filter_mode), ('note', sel_note)), lambda: note_figures(matrix, sel_note))
+
+            st.markdown(f"<h3>PAIRS WITH {sel_note.upper()}</h3>", unsafe_allow_html=True)
+            if note_figs['pairings'] is not None: plot(note_figs['pairings'])
+            else: st.info("This note is never listed with another.")
+            st.markdown("<div class='chart-insight'>Notes most often listed in the same perfume.</div>", unsafe_allow_html=True)
+
+            st.markdown("<h3>POPULARITY OVER TIME</h3>", unsafe_allow_html=True)
+            if note_figs['trend'] is not None: plot(note_figs['trend'])
+            st.markdown("<div class='chart-insight'>Share of each year's releases listing the note and its two closest pairings.</div>", unsafe_allow_html=True)
+
+# --- 8. DEBUG PANEL (hidden; open the app with ?debug=1) ---
+if st.query_params.get("debug") == "1":
+    with st.sidebar:
+        with st.expander("PROFILER", expanded=True):
+            stats = PROFILER.summary()
+            st.dataframe(pd.DataFrame.from_dict(stats, orient='index'), use_container_width=True)
+            st.download_button("Export JSON", PROFILER.to_json(), file_name="aromo_profile.json", mime="application/json")
+            st.download_button("Export Prometheus", PROFILER.to_prometheus(), file_name="aromo_profile.prom", mime="text/plain")
+            if st.button("Reset timings"): PROFILER.reset()
 
 # --- 9. FOOTER ---
 st.markdown("""
@@ -0,0 +1,80 @@
+"""
+Data preparation benchmark: legacy row-wise .apply() vs. vectorized derivation,
+plus the per-rerun SIGNATURE INGREDIENTS count (nested list + Counter vs. groupby).
+
+    python benchmarks/bench_prepare.py [path/to/aromo_english.csv]
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_engine  # noqa: E402
+
+
+def legacy_derive(df):
+    """The original per-row lambdas from app.load_data (reference implementation)."""
+    fams = df['families'].astype(str).replace('nan', 'Unknown')
+    main_fam = fams.apply(lambda x: x.split(',')[0].strip().title().replace("['", "").replace("']", "") if isinstance(x, str) else "Unknown")
+    notes = df['top_notes'].astype(str).replace('nan', '')
+    notes_display = notes.apply(lambda x: x[:60] + "..." if len(x) > 60 else x)
+    notes_list = notes.apply(lambda x: [i.strip() for i in x.split(',') if i.strip()])
+    return main_fam, notes_display, notes_list
+
+
+def vectorized_derive(df):
+    fams = df['families'].astype(str).replace('nan', 'Unknown')
+    notes = df['top_notes'].astype(str).replace('nan', '')
+    return data_engine.main_family(fams), data_engine.truncate_notes(notes), data_engine.split_notes(notes)
+
+
+def best_of(fn, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(csv_file):
+    raw = data_engine.read_catalog_csv(csv_file)
+    print(f"[INFO] {len(raw):,} rows")
+
+    t_old, old = best_of(lambda: legacy_derive(raw))
+    t_new, new = best_of(lambda: vectorized_derive(raw))
+    for name, a, b in zip(('Main_Fam', 'notes_display', 'notes_list'), old, new):
+        got = [list(x) for x in b] if name == 'notes_list' else b.tolist()
+        assert got == a.tolist(), f"vectorized {name} diverges from the legacy output"
+    print(f"derive columns   legacy {t_old:.3f}s   vectorized {t_new:.3f}s   ({t_old / t_new:.1f}x)")
+    t_full, _ = best_of(lambda: data_engine.prepare_frame(raw), repeats=3)
+    print(f"full prepare_frame {t_full:.3f}s")
+
+    df = data_engine.prepare_frame(raw)
+    t_table, notes_long = best_of(lambda: data_engine.build_note_table(df), repeats=3)
+    print(f"note long table  built once in {t_table:.3f}s ({len(notes_long):,} brand-note rows)")
+
+    # Per-rerun cost of SIGNATURE INGREDIENTS for the biggest brands
+    brands = df['Brand'].value_counts().head(50).index
+    def legacy_counts():
+        for brand in brands:
+            b_df = df[df['Brand'] == brand]
+            all_n = [x for sub in b_df['notes_list'] for x in sub]
+            pd.Series(Counter(all_n)).sort_values(ascending=False).head(8)
+    t_group, counts = best_of(lambda: data_engine.brand_note_counts(notes_long), repeats=3)
+    print(f"brand-note groupby once per scope: {t_group:.3f}s")
+    def grouped_counts():
+        for brand in brands:
+            counts.loc[brand].head(8)
+    t_old, _ = best_of(legacy_counts, repeats=3)
+    t_new, _ = best_of(grouped_counts, repeats=3)
+    print(f"brand note count legacy {t_old / len(brands) * 1000:.2f}ms   groupby {t_new / len(brands) * 1000:.2f}ms   per rerun")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, data_engine.INPUT_FILE))
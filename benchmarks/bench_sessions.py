@@ -0,0 +1,112 @@
+"""
+Per-session memory of the sidebar scope filter under concurrent sessions.
+
+Simulates N sessions that each hold the frames one rerun of app.py keeps alive:
+  legacy  - the st.cache_data copy of the dataset as the original load_data()
+            built it (object columns, notes_list as Python lists), df[mask].copy()
+            and a second .copy() for the Brand tab
+  shared  - references to the cache_resource dataset and scope view
+
+Each mode also has a once-per-process part: the pickled st.cache_data entry
+(legacy), or the CatalogState dataset, scope views and cubes (shared). The
+report gives both, total = process + N x session.
+
+    python benchmarks/bench_sessions.py [path/to/aromo_english.csv] [sessions]
+"""
+import os
+import pickle
+import sys
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_engine  # noqa: E402
+from analytics import CatalogState  # noqa: E402
+
+SCOPES = ["All Products", "Fine Fragrance Only"]
+
+
+def legacy_load(csv_file):
+    """The frame the original app.py load_data() cached: every text column a Python object."""
+    df = pd.read_csv(csv_file, sep=',', on_bad_lines='skip', engine='python')
+    df.columns = df.columns.str.lower().str.strip()
+    df = df.dropna(subset=['brand'])
+    df['Brand'] = df['brand'].astype(str).str.strip().str.lstrip("#*-").str.title()
+    df['display_name'] = df['name'].astype(str).str.strip() if 'name' in df.columns else "Unknown"
+    df['Type_Raw'] = df['type'].astype(str).str.strip() if 'type' in df.columns else "Fragrance"
+    if 'year' in df.columns:
+        df['year_clean'] = pd.to_numeric(df['year'], errors='coerce').fillna(0).astype(int)
+    else: df['year_clean'] = 0
+    df['Segment_Raw'] = df['segment'].astype(str) if 'segment' in df.columns else "Unknown"
+    if 'families' in df.columns:
+        df['families'] = df['families'].astype(str).replace('nan', 'Unknown')
+        df['Main_Fam'] = df['families'].apply(lambda x: x.split(',')[0].strip().title().replace("['", "").replace("']", "") if isinstance(x, str) else "Unknown")
+    else: df['Main_Fam'] = "Unknown"
+    if 'top_notes' in df.columns:
+        df['notes_display'] = df['top_notes'].astype(str).replace('nan', '').apply(lambda x: x[:60] + "..." if len(x) > 60 else x)
+        df['notes_list'] = df['top_notes'].astype(str).replace('nan', '').apply(lambda x: [i.strip() for i in x.split(',') if i.strip()])
+    else:
+        df['notes_display'] = ""; df['notes_list'] = [[] for _ in range(len(df))]
+    df['url'] = df['url'] if 'url' in df.columns else "#"
+    return df
+
+
+def legacy_session(payload, filter_mode):
+    # st.cache_data returns a fresh unpickled copy on every call
+    df = pickle.loads(payload)
+    if filter_mode == "Fine Fragrance Only":
+        df_filtered = df[data_engine.scope_mask(df, filter_mode)].copy()
+    else:
+        df_filtered = df.copy()
+    return df, df_filtered, df_filtered.copy()
+
+
+def shared_state(csv_file):
+    # What the dashboard keeps once per process: dataset, both scope views and their cubes
+    state = CatalogState(data_engine.dataset_version(csv_file), csv_file)
+    for mode in SCOPES:
+        state.scope(mode); state.cube(mode)
+    return state
+
+
+def shared_session(state, filter_mode):
+    return state.df, state.scope(filter_mode)
+
+
+def measure(make):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = make()
+    total = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return total, result
+
+
+def report(name, process, per_session, n_sessions):
+    total = process + n_sessions * per_session
+    print(f"{name:<14} {process / 1e6:8.1f} MB/process + {per_session / 1e6:8.4f} MB/session "
+          f"= {total / 1e6:8.1f} MB for {n_sessions} sessions")
+
+
+def run(csv_file, n_sessions=20):
+    if not os.path.exists(csv_file):
+        print(f"[ERROR] {csv_file} not found")
+        return
+    payload = pickle.dumps(legacy_load(csv_file))  # The cache entry: one pickle per process
+    shared_process, state = measure(lambda: shared_state(csv_file))
+    print(f"[INFO] {len(state.df):,} rows, {n_sessions} concurrent sessions (alternating scopes)")
+
+    legacy, _ = measure(lambda: [legacy_session(payload, SCOPES[i % 2]) for i in range(n_sessions)])
+    shared, _ = measure(lambda: [shared_session(state, SCOPES[i % 2]) for i in range(n_sessions)])
+    report("legacy copies", len(payload), legacy / n_sessions, n_sessions)
+    report("shared views", shared_process, shared / n_sessions, n_sessions)
+    if os.path.exists(data_engine.snapshot_path(csv_file)):
+        print("[INFO] Columns read from the memory-mapped snapshot sit in the page cache and are not counted")
+
+
+if __name__ == "__main__":
+    csv = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, data_engine.INPUT_FILE)
+    run(csv, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,75 @@
+"""
+Similar-fragrance search: exact latency and approximate (IVF) recall.
+
+Uses the real embedding store when it exists, otherwise a synthetic clustered
+catalog with the same shape (78k x 384, like all-MiniLM-L6-v2).
+
+    python benchmarks/bench_similarity.py [n_items]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from embedding_store import load_embedding_store, store_paths  # noqa: E402
+from similarity import SimilarityEngine  # noqa: E402
+
+
+def synthetic_vectors(n, dim=384, n_topics=2_000, seed=0):
+    """Perfume-like embeddings: noisy clusters around a few thousand "themes"."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, size=n)]
+    vectors += 1.0 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+
+
+def run(n_items=78_000, k=10, n_queries=200):
+    if os.path.exists(store_paths()[2]):
+        vectors = load_embedding_store()[0]
+        print(f"[INFO] Real embedding store: {vectors.shape}")
+    else:
+        vectors = synthetic_vectors(n_items)
+        print(f"[INFO] Synthetic catalog: {vectors.shape}")
+
+    start = time.perf_counter()
+    engine = SimilarityEngine(vectors)
+    print(f"load + normalize      {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    rng = np.random.default_rng(1)
+    items = rng.choice(len(engine), size=n_queries, replace=False)
+    it = iter(np.resize(items, 10_000))
+    p50, p95 = timed(lambda: engine.similar_to(next(it), k), n_queries)
+    print(f"exact single query    p50 {p50:6.2f} ms   p95 {p95:6.2f} ms   (target < 20 ms)")
+
+    start = time.perf_counter()
+    exact_ids, _ = engine.search(engine.vectors[items], k, exclude=items)
+    batch = (time.perf_counter() - start) * 1000
+    print(f"exact batch of {n_queries}   {batch:8.1f} ms   ({batch / n_queries:.2f} ms/query)")
+
+    start = time.perf_counter()
+    engine.build_ivf()
+    print(f"IVF build             {(time.perf_counter() - start):8.2f} s    ({len(engine.centroids)} lists)")
+    for n_probe in (4, 8, 16, 32):
+        it = iter(np.resize(items, 10_000))
+        p50, p95 = timed(lambda: engine.similar_to(next(it), k, approximate=True, n_probe=n_probe), n_queries)
+        approx_ids, _ = engine.search_ivf(engine.vectors[items], k, n_probe=n_probe, exclude=items)
+        recall = np.mean([len(np.intersect1d(a, e)) / k for a, e in zip(approx_ids, exact_ids)])
+        print(f"IVF n_probe={n_probe:<3}       p50 {p50:6.2f} ms   p95 {p95:6.2f} ms   recall@{k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 78_000)
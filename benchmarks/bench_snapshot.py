@@ -0,0 +1,76 @@
+"""
+Cold-start benchmark: CSV parse vs. memory-mapped snapshot.
+
+Each load runs in a fresh process so timings and resident memory are not
+polluted by caches from the previous run.
+
+    python benchmarks/bench_snapshot.py [path/to/aromo_english.csv]
+"""
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_engine  # noqa: E402
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _current_rss_mb():
+    # Resident set right now (Linux); falls back to the peak elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        return _peak_rss_mb()
+
+
+def _measure(mode, csv_file, snapshot_file, queue):
+    import pandas  # noqa: F401  (exclude the import itself from the measurement)
+    import pyarrow  # noqa: F401
+    base = _current_rss_mb()
+    start = time.perf_counter()
+    if mode == 'csv':
+        df = data_engine.prepare_frame(data_engine.read_catalog_csv(csv_file))
+    else:
+        df = data_engine.read_snapshot(snapshot_file)
+    elapsed = time.perf_counter() - start
+    queue.put((mode, len(df), elapsed, _current_rss_mb() - base, _peak_rss_mb()))
+
+
+def run(csv_file, repeats=3):
+    ctx = mp.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_file = os.path.join(tmp, 'bench_snapshot.arrow')
+        start = time.perf_counter()
+        data_engine.build_snapshot(csv_file, snapshot_file)
+        print(f"[INFO] Snapshot build: {time.perf_counter() - start:.2f}s "
+              f"({os.path.getsize(snapshot_file) / 1e6:.1f} MB on disk)")
+
+        print(f"{'mode':<10}{'rows':>10}{'best time (s)':>16}{'RSS delta (MB)':>17}{'peak RSS (MB)':>16}")
+        for mode in ('csv', 'snapshot'):
+            results = []
+            for _ in range(repeats):
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_measure, args=(mode, csv_file, snapshot_file, queue))
+                proc.start()
+                results.append(queue.get())
+                proc.join()
+            rows = results[0][1]
+            best = min(r[2] for r in results)
+            rss = min(r[3] for r in results)
+            peak = min(r[4] for r in results)
+            print(f"{mode:<10}{rows:>10,}{best:>16.3f}{rss:>17.1f}{peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, data_engine.INPUT_FILE))
@@ -0,0 +1,156 @@
+"""
+Startup-time breakdown: what each entry point imports and how long the
+dashboard takes to get its first page out.
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules:
+  1. imports  - `python -X importtime -c "import <module>"` per module; total
+                time plus the heaviest top-level packages it pulls in
+  2. app      - one headless run of app.py (streamlit AppTest) on a synthetic
+                catalog; profiler blocks show how long the header waits
+                (nothing), the deferred imports and the first data load take
+  3. model    - loading the sentence model (skipped without sentence_transformers)
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --rows 500000 --top 15 --json startup.json
+"""
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['streamlit', 'profiler', 'data_engine', 'analytics', 'charts', 'semantic_search', 'api_server',
+           '1_data_pipeline', '2_ai_engine']
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+APP_RUN = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_s = time.perf_counter() - start
+at = AppTest.from_file({app!r}, default_timeout=600)
+start = time.perf_counter()
+at.run()
+first_run_s = time.perf_counter() - start
+assert not at.exception, at.exception
+start = time.perf_counter()
+at.run()
+rerun_s = time.perf_counter() - start
+from profiler import PROFILER
+print(json.dumps({{'import_streamlit_s': streamlit_s, 'first_run_s': first_run_s, 'rerun_s': rerun_s,
+                  'blocks': PROFILER.summary()}}))
+"""
+
+
+# --- 1. IMPORT TIMES ---
+def import_profile(module, top=10):
+    """Total import time of `module` and its heaviest top-level packages (-X importtime, fresh process)."""
+    code = f"import importlib; importlib.import_module({module!r})"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+    packages, total_us = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line: continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):  # One separator space = imported at top level, deeper ones are indented
+            total_us += int(cumulative_us)
+        # Self time summed per top-level package, e.g. pandas._libs.* counts as pandas
+        root = name.strip().split('.')[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {'total_ms': total_us / 1000, 'packages_ms': {name: us / 1000 for name, us in heaviest}}
+
+
+# --- 2. DASHBOARD FIRST RUN ---
+def app_profile(n_rows, workdir):
+    """One cold app.py run (fresh process) on a synthetic catalog of n_rows."""
+    from synthetic_catalog import write_catalog_csv
+    pipeline = importlib.import_module('1_data_pipeline')
+
+    raw_csv = os.path.join(workdir, 'raw.csv')
+    clean_csv = os.path.join(workdir, 'aromo_english.csv')
+    write_catalog_csv(n_rows, raw_csv)
+    with contextlib.redirect_stdout(io.StringIO()):  # Pipeline progress lines
+        pipeline.clean_data(raw_csv, clean_csv)
+    env = dict(os.environ, AROMO_DATA_FILE=clean_csv, PYTHONPATH=os.pathsep.join(
+        [ROOT] + [p for p in os.environ.get('PYTHONPATH', '').split(os.pathsep) if p]))
+    proc = subprocess.run([sys.executable, '-c', APP_RUN.format(app=os.path.join(ROOT, 'app.py'))],
+                          cwd=workdir, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# --- 3. MODEL LOAD ---
+def model_profile(model_name=MODEL_NAME):
+    if importlib.util.find_spec('sentence_transformers') is None:
+        return {'skipped': 'sentence_transformers is not installed'}
+    code = ("import time; start = time.perf_counter(); from sentence_transformers import SentenceTransformer; "
+            "imported = time.perf_counter(); SentenceTransformer(%r); done = time.perf_counter(); "
+            "print(imported - start, done - imported)" % model_name)
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+    import_s, load_s = map(float, proc.stdout.split()[-2:])
+    return {'import_s': import_s, 'load_s': load_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time breakdown of the Aromo entry points")
+    parser.add_argument('--rows', type=int, default=78_000, help="Synthetic catalog size for the app run")
+    parser.add_argument('--top', type=int, default=8, help="Heaviest packages listed per module")
+    parser.add_argument('--skip-app', action='store_true', help="Only measure imports and the model")
+    parser.add_argument('--json', default=None, help="Save results to this file")
+    args = parser.parse_args()
+    results = {'imports': {}}
+
+    print("[INFO] Import time per module (fresh interpreter, -X importtime)")
+    for module in MODULES:
+        row = results['imports'][module] = import_profile(module, args.top)
+        if 'error' in row:
+            print(f"  {module:<18} failed: {row['error']}")
+            continue
+        heaviest = ', '.join(f"{name} {ms:.0f}" for name, ms in row['packages_ms'].items())
+        print(f"  {module:<18} {row['total_ms']:8.0f} ms   ({heaviest})")
+
+    if not args.skip_app:
+        print(f"\n[INFO] Cold app.py run on {args.rows:,} synthetic rows (streamlit AppTest)")
+        with tempfile.TemporaryDirectory() as workdir:
+            app = results['app'] = app_profile(args.rows, workdir)
+        if 'error' in app:
+            print(f"  failed: {app['error']}")
+        else:
+            blocks = app['blocks']
+            print(f"  import streamlit       {app['import_streamlit_s'] * 1000:8.0f} ms")
+            for name in ('app.imports', 'data.load', 'data.cube', 'app.rerun'):
+                if name in blocks: print(f"  {name:<22} {blocks[name]['max_ms']:8.0f} ms   (first run)")
+            print(f"  first run total        {app['first_run_s'] * 1000:8.0f} ms   (header is sent before app.imports)")
+            print(f"  warm rerun             {app['rerun_s'] * 1000:8.0f} ms")
+
+    print(f"\n[INFO] Sentence model ({MODEL_NAME})")
+    model = results['model'] = model_profile()
+    if 'import_s' in model:
+        print(f"  import {model['import_s']:.2f} s, load {model['load_s']:.2f} s (warmed on a background thread by the app)")
+    else:
+        print(f"  {model.get('skipped') or model.get('error')}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[INFO] Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Load test for api_server.py: concurrent keep-alive clients replaying a mix of
+brand, top-N, pairing, competitor, similarity and search requests.
+
+Reports throughput, latency percentiles, status codes and the share of
+responses served from the response cache (X-Cache header). Standard library
+only; --spawn starts the server itself on a free port and stops it afterwards.
+
+    python api_server.py --port 8000 &
+    python benchmarks/load_test.py --port 8000 --concurrency 64 --requests 20000
+    python benchmarks/load_test.py --spawn --data-file aromo_english.csv
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERIES = ['smoky vanilla oud', 'fresh citrus bergamot', 'rose musk', 'woody amber night',
+           'green fig', 'leather tobacco', 'powdery iris', 'sweet gourmand tonka']
+
+
+# --- 1. CLIENT ---
+class Connection:
+    """One keep-alive HTTP/1.1 connection (requests are sent one at a time)."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = {k.strip().lower(): v.strip() for k, v in (line.split(':', 1) for line in lines[1:] if ':' in line)}
+        body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close': await self.close()
+        return int(lines[0].split(' ')[1]), headers, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def fetch_json(host, port, path):
+    conn = Connection(host, port)
+    try:
+        status, _, body = await conn.get(path)
+    finally:
+        await conn.close()
+    return status, json.loads(body)
+
+
+# --- 2. WORKLOAD ---
+async def build_workload(host, port, n_requests, n_brands, seed=0):
+    """Request paths: popular brands weighted like real traffic (Zipf-ish), plus uncached search tails."""
+    _, brands = await fetch_json(host, port, f'/top/brands?n={n_brands}')
+    _, notes = await fetch_json(host, port, '/top/notes?n=50')
+    _, health = await fetch_json(host, port, '/health')
+    brands = [row['label'] for row in brands['rows']]
+    notes = [row['label'] for row in notes['rows']]
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(brands))]
+
+    def brand():
+        return quote(rng.choices(brands, weights)[0], safe='')
+
+    kinds = [
+        (30, lambda: f"/brands/{brand()}?scope={rng.choice(['all', 'fine'])}"),
+        (15, lambda: f"/top/{rng.choice(['brands', 'families', 'years', 'words', 'notes'])}?n={rng.choice([10, 15, 25])}"),
+        (10, lambda: f"/pairings/{quote(rng.choice(notes), safe='')}"),
+        (15, lambda: f"/competitors/{brand()}"),
+        (15, lambda: f"/similar/{rng.randrange(health['rows'])}?k=6"),
+        (15, lambda: f"/search?q={quote(rng.choice(QUERIES) + ' ' + str(rng.randrange(200)))}&k=9"),
+    ]
+    makers = rng.choices([make for _, make in kinds], [w for w, _ in kinds], k=n_requests)
+    return [make() for make in makers]
+
+
+async def run_load(host, port, paths, concurrency):
+    queue = iter(paths)
+    latencies, statuses, hits = [], {}, 0
+
+    async def client():
+        nonlocal hits
+        conn = Connection(host, port)
+        try:
+            for path in queue:  # Shared iterator: each client takes the next path when free
+                start = time.perf_counter()
+                status, headers, _ = await conn.get(path)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                hits += headers.get('x-cache') == 'hit'
+        finally:
+            await conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {'requests': len(latencies), 'seconds': seconds, 'rps': len(latencies) / seconds,
+            'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)),
+            'p99_ms': float(np.percentile(ms, 99)), 'max_ms': float(ms.max()),
+            'cache_hit_ratio': hits / len(latencies), 'statuses': {str(k): v for k, v in sorted(statuses.items())}}
+
+
+# --- 3. SERVER PROCESS (--spawn) ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(host, port, process, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None: sys.exit(f"[ERROR] api_server.py exited with code {process.returncode}")
+        try:
+            await fetch_json(host, port, '/health')
+            return
+        except (OSError, asyncio.IncompleteReadError):
+            await asyncio.sleep(0.5)
+    sys.exit("[ERROR] api_server.py did not start in time")
+
+
+def report(result):
+    print(f"  requests      {result['requests']:,} in {result['seconds']:.2f} s")
+    print(f"  throughput    {result['rps']:,.0f} req/s")
+    print(f"  latency       p50 {result['p50_ms']:.2f} ms  p95 {result['p95_ms']:.2f} ms  "
+          f"p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.1f} ms")
+    print(f"  cache hits    {result['cache_hit_ratio']:.1%}")
+    print(f"  statuses      {result['statuses']}")
+
+
+async def main_async(args):
+    process = None
+    if args.spawn:
+        args.port = free_port()
+        command = [sys.executable, os.path.join(ROOT, 'api_server.py'), '--port', str(args.port)]
+        if args.data_file: command += ['--data-file', args.data_file]
+        process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL if not args.verbose else None)
+        await wait_ready(args.host, args.port, process, args.startup_timeout)
+    try:
+        paths = await build_workload(args.host, args.port, args.requests, args.brands)
+        print(f"[INFO] {args.requests:,} requests, {args.concurrency} concurrent connections")
+        results = {}
+        # Cold pass fills the response cache; the warm pass replays the same mix
+        for name in ('cold', 'warm'):
+            print(f"\n[INFO] {name} pass")
+            results[name] = await run_load(args.host, args.port, paths, args.concurrency)
+            report(results[name])
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n[INFO] Results saved to {args.json}")
+        if args.min_rps and results['warm']['rps'] < args.min_rps:
+            print(f"[REGRESSION] warm throughput {results['warm']['rps']:.0f} req/s < {args.min_rps:.0f}")
+            return 1
+        return 0
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the Aromo analytics API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--spawn', action='store_true', help="Start api_server.py on a free port for the run")
+    parser.add_argument('--data-file', default=None, help="Dataset for the spawned server")
+    parser.add_argument('--startup-timeout', type=float, default=600, help="Seconds to wait for the spawned server")
+    parser.add_argument('--verbose', action='store_true', help="Show the spawned server's output")
+    parser.add_argument('--requests', type=int, default=10_000, help="Requests per pass")
+    parser.add_argument('--concurrency', type=int, default=64, help="Concurrent keep-alive connections")
+    parser.add_argument('--brands', type=int, default=100, help="Distinct brands in the request mix")
+    parser.add_argument('--json', default=None, help="Save results to this file")
+    parser.add_argument('--min-rps', type=float, default=0, help="Exit 1 if the warm pass is slower than this")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Headless benchmark suite: pipeline, data engine, chart aggregations and search
+on synthetic catalogs (78k / 500k / 5M rows by default).
+
+Runs without Streamlit or the network: the sentence model is replaced by a
+deterministic stub, so search timings cover our code, not the transformer.
+Reports wall time and peak memory (RSS above the stage's starting point) per
+stage; --json saves the results and --baseline fails the run (exit 1) when a
+stage got slower than --max-regression allows, for gating releases.
+
+    python benchmarks/suite.py                       # 78k, 500k, 5M
+    python benchmarks/suite.py --sizes 78000 --json bench.json
+    python benchmarks/suite.py --sizes 78000 --baseline bench.json --max-regression 0.25
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import charts  # noqa: E402
+import data_engine  # noqa: E402
+import semantic_search  # noqa: E402
+from keyword_index import KeywordIndex  # noqa: E402
+from similarity import APPROX_THRESHOLD, SimilarityEngine  # noqa: E402
+from synthetic_catalog import write_catalog_csv  # noqa: E402
+
+pipeline = importlib.import_module('1_data_pipeline')
+
+DEFAULT_SIZES = [78_000, 500_000, 5_000_000]
+SCOPES = ["All Products", "Fine Fragrance Only"]
+STUB_MODEL = 'stub-minilm'
+EMBED_DIM = 384  # all-MiniLM-L6-v2
+MAX_VECTORS = 1_000_000  # 5M x 384 float32 would need 7.7 GB; larger catalogs embed a prefix
+QUERIES = ['smoky vanilla oud', 'fresh citrus bergamot', 'rose musk', 'woody amber night',
+           'green fig', 'leather tobacco', 'powdery iris', 'sweet gourmand tonka']
+
+
+# --- 1. STUB MODEL ---
+class StubSentenceModel:
+    """Stands in for SentenceTransformer: clustered unit vectors derived from a text hash."""
+
+    def __init__(self, dim=EMBED_DIM, n_topics=2_000, seed=0):
+        self.topics = np.random.default_rng(seed).standard_normal((n_topics, dim)).astype(np.float32)
+
+    def encode(self, texts, normalize_embeddings=True, batch_size=64, **kwargs):
+        hashes = pd.util.hash_array(np.asarray(texts, dtype=object))
+        out = np.empty((len(hashes), self.topics.shape[1]), dtype=np.float32)
+        for start in range(0, len(hashes), 100_000):
+            h = hashes[start:start + 100_000]
+            rng = np.random.default_rng(int(h[0]) if len(h) else 0)
+            block = self.topics[h % len(self.topics)] + rng.standard_normal((len(h), out.shape[1]), dtype=np.float32)
+            if normalize_embeddings: block /= np.linalg.norm(block, axis=1, keepdims=True)
+            out[start:start + len(h)] = block
+        return out
+
+
+# --- 2. MEASUREMENT ---
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:  # Not Linux: peak-so-far is the best available
+        return pipeline.peak_memory_mb()
+
+
+class PeakMemory:
+    """Samples RSS in a background thread; peak_mb is the high-water mark above the start."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+
+    def __enter__(self):
+        gc.collect()
+        self.start_mb = self.peak_abs = current_rss_mb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak_abs = max(self.peak_abs, current_rss_mb())
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak_abs = max(self.peak_abs, current_rss_mb())
+        self.peak_mb = self.peak_abs - self.start_mb
+        return False
+
+
+class Report:
+    def __init__(self):
+        self.results = {}
+
+    def stage(self, size, name, fn):
+        """Runs fn once; records seconds and peak memory."""
+        with PeakMemory() as mem:
+            start = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - start
+        self._add(size, name, {'seconds': seconds, 'peak_mb': mem.peak_mb})
+        return result
+
+    def latency(self, size, name, fn, args):
+        """Calls fn once per argument; records p50/p95 milliseconds."""
+        times = []
+        with PeakMemory() as mem:
+            for arg in args:
+                start = time.perf_counter()
+                fn(arg)
+                times.append(time.perf_counter() - start)
+        ms = np.array(times) * 1000
+        self._add(size, name, {'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)),
+                               'calls': len(times), 'peak_mb': mem.peak_mb})
+
+    def _add(self, size, name, row):
+        self.results.setdefault(str(size), {})[name] = row
+        if 'seconds' in row:
+            print(f"  {name:<28} {row['seconds']:9.3f} s                      peak +{row['peak_mb']:8.1f} MB")
+        else:
+            print(f"  {name:<28} p50 {row['p50_ms']:8.3f} ms  p95 {row['p95_ms']:8.3f} ms  peak +{row['peak_mb']:8.1f} MB")
+
+
+# --- 3. STAGES ---
+def quietly(fn, *args, **kwargs):
+    # The pipeline reports progress on stdout; keep the benchmark table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def bench_size(report, n_rows, workdir, max_vectors=MAX_VECTORS):
+    raw_csv = os.path.join(workdir, f'raw_{n_rows}.csv')
+    clean_csv = os.path.join(workdir, f'clean_{n_rows}.csv')
+    snapshot = os.path.join(workdir, f'snapshot_{n_rows}.arrow')
+    print(f"\n[INFO] {n_rows:,} rows")
+
+    report.stage(n_rows, 'setup.generate_csv', lambda: write_catalog_csv(n_rows, raw_csv))
+    report.stage(n_rows, 'pipeline.clean_data', lambda: quietly(
+        pipeline.clean_data, raw_csv, clean_csv, chunksize=pipeline.DEFAULT_CHUNKSIZE))
+
+    # load_data equivalent: cold CSV parse + derivation, then the snapshot round trip
+    raw = report.stage(n_rows, 'engine.read_csv', lambda: data_engine.read_catalog_csv(clean_csv))
+    df = report.stage(n_rows, 'engine.prepare_frame', lambda: data_engine.prepare_frame(raw))
+    del raw
+    report.stage(n_rows, 'engine.write_snapshot', lambda: data_engine.write_snapshot(df, snapshot))
+    report.stage(n_rows, 'engine.read_snapshot', lambda: data_engine.read_snapshot(snapshot))
+
+    # Aggregations behind the dashboard charts
+    notes = report.stage(n_rows, 'agg.note_table', lambda: data_engine.build_note_table(df))
+    tokens = report.stage(n_rows, 'agg.name_tokens', lambda: data_engine.build_name_tokens(df))
+    cubes = {}
+    for scope in SCOPES:
+        label = 'all' if scope == SCOPES[0] else 'fine'
+        mask = report.stage(n_rows, f'agg.scope_mask[{label}]', lambda: data_engine.scope_mask(df, scope))
+        cubes[scope] = report.stage(n_rows, f'agg.market_cube[{label}]',
+                                    lambda: data_engine.build_market_cube(df, notes, tokens, mask))
+    cube = cubes[SCOPES[0]]
+    brands = cube['brand_counts'].index[:200].tolist()
+    report.latency(n_rows, 'agg.brand_profile', lambda b: data_engine.brand_profile(cube, b), brands)
+    report.stage(n_rows, 'charts.global_figures', lambda: charts.global_figures(cube))
+    report.latency(n_rows, 'charts.brand_figures',
+                   lambda b: charts.brand_figures(data_engine.brand_profile(cube, b)), brands[:50])
+    fig = charts.global_figures(cube)['brands']
+    report.latency(n_rows, 'charts.serialize', lambda _: fig.to_json(), range(50))
+    del notes, tokens, cubes, cube
+
+    # Search: BM25 keyword index, stub-encoded embeddings, exact/IVF and hybrid queries
+    index = report.stage(n_rows, 'search.keyword_build', lambda: KeywordIndex.build(df))
+    report.latency(n_rows, 'search.keyword_query', lambda q: index.search(q, 10), QUERIES * 10)
+
+    model = StubSentenceModel()
+    semantic_search._models[STUB_MODEL] = model
+    n_vec = min(len(df), max_vectors)
+    texts = (df['Brand'].astype(str) + ' ' + df['display_name'].astype(str)).iloc[:n_vec].tolist()
+    vectors = report.stage(n_rows, 'search.embed_catalog(stub)', lambda: model.encode(texts))
+    del texts
+    engine = report.stage(n_rows, 'search.engine_init', lambda: SimilarityEngine(vectors))
+    items = np.random.default_rng(1).choice(len(engine), size=min(100, len(engine)), replace=False)
+    report.latency(n_rows, 'search.similar_exact', lambda i: engine.similar_to(i, k=6), items)
+    if len(engine) > APPROX_THRESHOLD:
+        report.stage(n_rows, 'search.ivf_build', lambda: engine.build_ivf())
+        report.latency(n_rows, 'search.similar_ivf', lambda i: engine.similar_to(i, k=6, approximate=True), items)
+
+    encoder = semantic_search.QueryEncoder(STUB_MODEL)
+    item_to_catalog = np.arange(len(engine))
+    report.latency(n_rows, 'search.hybrid_query',
+                   lambda q: semantic_search.hybrid_search(q, index, engine, encoder, item_to_catalog, k=9),
+                   [f'{q} {i}' for i in range(10) for q in QUERIES])
+    if n_vec < len(df):
+        print(f"  (embedding stages use the first {n_vec:,} rows)")
+
+    for path in (raw_csv, clean_csv, snapshot):
+        if os.path.exists(path): os.remove(path)
+
+
+# --- 4. REGRESSION GATE ---
+def regressions(results, baseline, max_regression):
+    """Stages slower than baseline * (1 + max_regression), as printable lines."""
+    failed = []
+    for size, stages in results.items():
+        for name, row in stages.items():
+            old = baseline.get(size, {}).get(name)
+            if old is None or name.startswith('setup.'): continue
+            metric = 'seconds' if 'seconds' in row else 'p50_ms'
+            if old[metric] > 0 and row[metric] > old[metric] * (1 + max_regression):
+                failed.append(f"{size} {name}: {old[metric]:.4g} -> {row[metric]:.4g} {metric}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Aromo benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Catalog sizes in rows")
+    parser.add_argument('--workdir', default=None, help="Where the synthetic files go (default: a temp dir)")
+    parser.add_argument('--max-vectors', type=int, default=MAX_VECTORS, help="Embedded rows per catalog")
+    parser.add_argument('--json', default=None, help="Save results to this file")
+    parser.add_argument('--baseline', default=None, help="Results file to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    report = Report()
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for n_rows in args.sizes:
+            bench_size(report, n_rows, workdir, args.max_vectors)
+            gc.collect()
+
+    assert 'streamlit' not in sys.modules, "the suite must stay headless"
+    print(f"\n[INFO] Peak RSS of the whole run: {pipeline.peak_memory_mb():.0f} MB")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report.results, f, indent=2)
+        print(f"[INFO] Results saved to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed = regressions(report.results, json.load(f), args.max_regression)
+        for line in failed: print(f"[REGRESSION] {line}")
+        if failed: sys.exit(1)
+        print("[INFO] No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
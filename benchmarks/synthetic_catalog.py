@@ -0,0 +1,92 @@
+"""
+Synthetic raw catalogs with the aromo_english.csv schema, for benchmarking at
+sizes the real dataset does not reach.
+
+    python benchmarks/synthetic_catalog.py 500000 synthetic_500k.csv
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['brand', 'name', 'families', 'type', 'top_notes', 'year', 'segment', 'url']
+
+FAMILIES = ['floral', 'woody', 'amber', 'citrus', 'fougere', 'chypre', 'gourmand', 'aromatic',
+            'leather', 'green', 'aquatic', 'fruity', 'spicy', 'musky', 'powdery']
+TYPES = ['Eau de Parfum', 'Eau de Toilette', 'Parfum', 'Extrait de Parfum', 'Cologne', 'Eau de Cologne',
+         'Body Lotion', 'Deodorant', 'Hair Mist', 'Shower Gel']
+SEGMENTS = ['Niche', 'Luxury', 'Mass Market', 'Designer']
+COMMON_NOTES = ['bergamot', 'vanilla', 'musk', 'rose', 'jasmine', 'amber', 'patchouli', 'sandalwood',
+                'lemon', 'pink pepper', 'oud', 'vetiver', 'cedar', 'iris', 'tonka bean', 'mandarin']
+NAME_WORDS = ['love', 'night', 'blue', 'gold', 'noir', 'rose', 'intense', 'homme', 'femme', 'eau',
+              'de', 'parfum', 'sport', 'absolu', 'oud', 'black', 'white', 'pour', 'elle', 'lui']
+
+
+def _pick(rng, choices, n, weights=None):
+    return np.asarray(choices, dtype=object)[rng.choice(len(choices), size=n, p=weights)]
+
+
+def make_catalog(n_rows, seed=0):
+    """Raw (uncleaned) catalog: Zipf-like brand sizes, missing years/families, 0-10 notes per row."""
+    rng = np.random.default_rng(seed)
+
+    # Brands: a long tail like the real data (a few catalog houses with thousands of rows)
+    n_brands = max(3_000, n_rows // 25)
+    brand_weights = 1.0 / np.arange(1, n_brands + 1) ** 0.9
+    brand_weights /= brand_weights.sum()
+    brands = np.array([f'maison {i} ' if i % 7 else f' house {i}' for i in range(n_brands)], dtype=object)
+    brand = brands[rng.choice(n_brands, size=n_rows, p=brand_weights)]
+
+    # Names: three words, mostly from a long synthetic vocabulary, some marketing favourites
+    vocab = np.array(NAME_WORDS + [f'word{i}' for i in range(5_000)], dtype=object)
+    word_weights = np.r_[np.full(len(NAME_WORDS), 8.0), np.ones(5_000)]
+    word_weights /= word_weights.sum()
+    w = rng.choice(len(vocab), size=(3, n_rows), p=word_weights)
+    name = vocab[w[0]] + ' ' + vocab[w[1]] + ' ' + vocab[w[2]]
+
+    # Families in both spellings the real file uses, ~5% missing
+    fam_pool = []
+    for _ in range(2_000):
+        picked = rng.choice(FAMILIES, size=rng.integers(1, 4), replace=False).tolist()
+        fam_pool.append(str(picked) if rng.random() < 0.5 else ', '.join(picked))
+    families = _pick(rng, fam_pool + [None] * 100, n_rows)
+
+    # Notes: a pool of note lists (1,500-note vocabulary) sampled per row
+    note_vocab = np.array(COMMON_NOTES + [f'note {i}' for i in range(1_500)], dtype=object)
+    note_weights = 1.0 / np.arange(1, len(note_vocab) + 1) ** 0.8
+    note_weights /= note_weights.sum()
+    note_pool = [', '.join(note_vocab[rng.choice(len(note_vocab), size=k, replace=False, p=note_weights)])
+                 for k in rng.integers(0, 11, size=20_000)]
+    top_notes = _pick(rng, note_pool, n_rows)
+    top_notes[rng.random(n_rows) < 0.05] = None
+
+    years = rng.integers(1950, 2027, size=n_rows).astype(float)
+    years = np.where(rng.random(n_rows) < 0.6, rng.integers(2000, 2027, size=n_rows), years)
+    missing = rng.random(n_rows)
+    years[missing < 0.05] = 0
+    years[(missing >= 0.05) & (missing < 0.10)] = np.nan
+
+    df = pd.DataFrame({
+        'brand': brand,
+        'name': name,
+        'families': families,
+        'type': _pick(rng, TYPES + [None], n_rows),
+        'top_notes': top_notes,
+        'year': pd.array(years, dtype='Int64'),
+        'segment': _pick(rng, SEGMENTS + [None, None], n_rows),
+        'url': 'https://aromo.ru/perfumes/' + pd.Series(np.arange(n_rows)).astype(str),
+    })
+    return df[COLUMNS]
+
+
+def write_catalog_csv(n_rows, path, seed=0, chunk_rows=1_000_000):
+    """Writes the catalog in chunks so 5M-row files do not need every row in memory at once."""
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = make_catalog(min(chunk_rows, n_rows - start), seed=seed + i)
+        chunk['url'] = 'https://aromo.ru/perfumes/' + pd.Series(np.arange(start, start + len(chunk))).astype(str)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return path
+
+
+if __name__ == "__main__":
+    write_catalog_csv(int(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from similarity import SimilarityEngine, normalize_rows
+
+# --- CONFIGURATION ---
+ITEM_BLOCK = 65_536  # perfume vectors summed per block (bounds temp memory on the memory map)
+BRAND_BLOCK = 1_024  # brands scored per block in the brand x brand search
+TOP_K = 10
+
+
+def brand_centroids(vectors, brand_codes, n_brands):
+    """Re-normalized mean embedding per brand, plus the number of perfumes behind it.
+
+    brand_codes[i] is the brand of vectors[i] (-1 = skip). Each block is summed
+    with one sparse (brand x perfume) product, so the vectors are streamed, not
+    copied whole. Brands without vectors keep a zero row.
+    """
+    sums = np.zeros((n_brands, vectors.shape[1]), dtype=np.float32)
+    counts = np.zeros(n_brands, dtype=np.int64)
+    for start in range(0, len(vectors), ITEM_BLOCK):
+        codes = np.asarray(brand_codes[start:start + ITEM_BLOCK])
+        keep = np.flatnonzero(codes >= 0)
+        block = normalize_rows(np.asarray(vectors[start:start + ITEM_BLOCK], dtype=np.float32)[keep])
+        members = sp.csr_matrix((np.ones(len(keep), dtype=np.float32), (codes[keep], np.arange(len(keep)))),
+                                shape=(n_brands, len(keep)))
+        sums += members @ block
+        counts += np.bincount(codes[keep], minlength=n_brands)
+    return normalize_rows(sums), counts
+
+
+def project_2d(vectors):
+    """First two principal components (PCA via SVD of the centered rows)."""
+    if len(vectors) < 2: return np.zeros((len(vectors), 2), dtype=np.float32)
+    centered = vectors - vectors.mean(axis=0)
+    u, s, _ = np.linalg.svd(centered, full_matrices=False)
+    return (u[:, :2] * s[:2]).astype(np.float32)
+
+
+class BrandSimilarity:
+    """Brand x brand nearest neighbours and a 2-D map, precomputed from brand centroids.
+
+    The top-k table is filled block by block (BRAND_BLOCK query brands at a time
+    against every centroid), so thousands of brands never need a full
+    brand x brand matrix; a brand page is then a row lookup.
+    """
+
+    def __init__(self, brands, centroids, counts, k=TOP_K):
+        self.brands = pd.Index(brands)
+        self.counts = counts
+        has_vec = np.flatnonzero(counts > 0)
+        self.neighbours = np.full((len(brands), k), -1, dtype=np.int64)
+        self.scores = np.zeros((len(brands), k), dtype=np.float32)
+
+        engine = SimilarityEngine(centroids[has_vec])
+        for start in range(0, len(has_vec), BRAND_BLOCK):
+            local = np.arange(start, min(start + BRAND_BLOCK, len(has_vec)))
+            ids, scores = engine.search(engine.vectors[local], k, exclude=local)
+            ids = np.where(ids == local[:, None], -1, ids)  # Fewer than k other brands: self is not dropped
+            found = ids.shape[1]
+            self.neighbours[has_vec[local], :found] = np.where(ids >= 0, has_vec[np.maximum(ids, 0)], -1)
+            self.scores[has_vec[local], :found] = scores
+
+        self.projection = np.full((len(brands), 2), np.nan, dtype=np.float32)
+        self.projection[has_vec] = project_2d(engine.vectors)
+
+    @classmethod
+    def build(cls, vectors, brand_codes, brands, k=TOP_K):
+        centroids, counts = brand_centroids(vectors, brand_codes, len(brands))
+        return cls(brands, centroids, counts, k)
+
+    def competitors(self, brand, k=TOP_K):
+        """Closest brands: similarity (cosine of centroids) and perfumes (vectors behind each)."""
+        i = self.brands.get_indexer([brand])[0]
+        if i < 0 or self.counts[i] == 0:
+            return pd.DataFrame(columns=['similarity', 'perfumes'])
+        ids = self.neighbours[i, :k]
+        keep = ids >= 0
+        ids = ids[keep]
+        return pd.DataFrame({'similarity': self.scores[i, :k][keep], 'perfumes': self.counts[ids]},
+                            index=self.brands[ids])
+
+    def projection_frame(self):
+        """Brand, x, y, perfumes for every brand with vectors."""
+        has_vec = self.counts > 0
+        return pd.DataFrame({'Brand': self.brands[has_vec], 'x': self.projection[has_vec, 0],
+                             'y': self.projection[has_vec, 1], 'perfumes': self.counts[has_vec]})
@@ -0,0 +1,193 @@
+import plotly.graph_objects as go
+import threading
+from collections import OrderedDict
+
+from data_engine import brand_profile
+
+# --- CONFIGURATION ---
+FIGURE_CACHE_SIZE = 512  # (scope, brand) entries kept; least recently used are evicted
+TRANSPARENT = 'rgba(0,0,0,0)'
+BAR_TEXT = dict(color='white', size=14, weight='bold')
+LINE_COLORS = ['#D4AF37', '#B8860B', '#A0522D']
+
+
+# --- 1. FIGURE BUILDERS ---
+def hbar_figure(series, color, height, headroom):
+    """Horizontal bars with the value printed at the end of each bar."""
+    x_vals = series.values.tolist()
+    y_vals = series.index.tolist()
+    fig = go.Figure(go.Bar(
+        x=x_vals, y=y_vals, orientation='h',
+        text=x_vals,
+        textposition='outside',
+        texttemplate='%{x}',  # Force X value
+        cliponaxis=False,
+        marker_color=color, textfont=BAR_TEXT
+    ))
+    fig.update_layout(
+        plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT, height=height,
+        xaxis=dict(showgrid=False, visible=False, range=[0, max(x_vals) * headroom]),
+        yaxis=dict(tickfont=dict(color='#E0E0E0', size=12)),
+        margin=dict(r=180)  # HUGE RIGHT MARGIN
+    )
+    return fig
+
+
+def vbar_figure(series, color, height, yaxis, margin):
+    """Vertical bars over category (year) labels with the value on top."""
+    x_vals = series.index.astype(str).tolist()
+    y_vals = series.values.tolist()
+    fig = go.Figure(go.Bar(
+        x=x_vals, y=y_vals,
+        text=y_vals,
+        textposition='outside',  # Value on top
+        texttemplate='%{y}',     # Force Y value
+        cliponaxis=False,
+        marker_color=color, textfont=BAR_TEXT
+    ))
+    fig.update_layout(
+        plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT, height=height,
+        xaxis=dict(showgrid=False, title="", type='category'),
+        yaxis=dict(range=[0, max(y_vals) * 1.4], **yaxis),
+        margin=margin
+    )
+    return fig
+
+
+def brand_figures(profile):
+    """ACTIVITY TIMELINE, OLFACTORY DNA and SIGNATURE INGREDIENTS (None = nothing to plot)."""
+    timeline = profile['years']
+    timeline = timeline[timeline.index >= 2000]
+    families = profile['families'].head(8).sort_values(ascending=True)
+    notes = profile['notes'].head(8).sort_values(ascending=True)
+    return {
+        'timeline': vbar_figure(timeline, '#D4AF37', 450, dict(showgrid=True, gridcolor='#333', title=""),
+                                dict(t=50, b=40)) if not timeline.empty else None,
+        'dna': hbar_figure(families, '#D4AF37', 500, 1.5) if not families.empty else None,
+        'ingredients': hbar_figure(notes, '#B8860B', 500, 1.5) if not notes.empty else None,
+    }
+
+
+def global_figures(cube):
+    """The four GLOBAL MARKET charts for one scope."""
+    brands = cube['brand_counts'].head(15).sort_values(ascending=True)
+    families = cube['family_counts'].head(15)
+    if 'Unknown' in families: families = families.drop('Unknown')
+    families = families.sort_values(ascending=True)
+    years = cube['year_counts']
+    years = years[(years.index > 1990) & (years.index <= 2026)].head(15).sort_index(ascending=True)
+    words = cube['name_words'].head(15).sort_values(ascending=True)
+    return {
+        'brands': hbar_figure(brands, '#D4AF37', 600, 1.4) if not brands.empty else None,
+        'families': hbar_figure(families, '#B8860B', 600, 1.4) if not families.empty else None,
+        'years': vbar_figure(years, '#A0522D', 500, dict(showgrid=False, visible=False),
+                             dict(t=50)) if not years.empty else None,
+        'words': hbar_figure(words, '#B8860B', 600, 1.4) if not words.empty else None,
+    }
+
+
+def line_figure(frame, height):
+    """One gold-toned line per column, share of releases on the y axis."""
+    fig = go.Figure()
+    for color, col in zip(LINE_COLORS, frame.columns):
+        fig.add_trace(go.Scatter(
+            x=frame.index.astype(str).tolist(), y=frame[col].tolist(), name=str(col),
+            mode='lines+markers', line=dict(color=color, width=3), marker=dict(size=7)
+        ))
+    fig.update_layout(
+        plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT, height=height,
+        xaxis=dict(showgrid=False, title="", type='category'),
+        yaxis=dict(showgrid=True, gridcolor='#333', title="", tickformat='.0%', rangemode='tozero'),
+        legend=dict(font=dict(color='#E0E0E0', size=12), orientation='h', y=1.1),
+        margin=dict(t=50, b=40)
+    )
+    return fig
+
+
+def note_figures(matrix, note):
+    """PAIRS WITH and POPULARITY OVER TIME for one note (None = nothing to plot)."""
+    pairs = matrix.pairings(note, k=10)
+    trend = matrix.trend([note] + pairs.index[:2].tolist(), start=2000, end=2026)
+    counts = pairs['count'].astype(int).sort_values(ascending=True)
+    return {
+        'pairings': hbar_figure(counts, '#D4AF37', 500, 1.5) if not counts.empty else None,
+        'trend': line_figure(trend, 450) if not trend.empty else None,
+    }
+
+
+def map_figure(points, brand, rivals, height):
+    """2-D brand map: every house in grey, rivals and the selected brand labelled."""
+    fig = go.Figure()
+    layers = [
+        (points[~points['Brand'].isin([brand] + rivals)], '#444', 5, 'markers'),
+        (points[points['Brand'].isin(rivals)], '#B8860B', 10, 'markers+text'),
+        (points[points['Brand'] == brand], '#D4AF37', 16, 'markers+text'),
+    ]
+    for layer, color, size, mode in layers:
+        labels = layer['Brand'].astype(str).tolist()
+        fig.add_trace(go.Scatter(
+            x=layer['x'].tolist(), y=layer['y'].tolist(), mode=mode,
+            text=labels if mode != 'markers' else None, hovertext=labels, hoverinfo='text',
+            textposition='top center', textfont=dict(color='#E0E0E0', size=12),
+            marker=dict(color=color, size=size)
+        ))
+    fig.update_layout(
+        plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT, height=height, showlegend=False,
+        xaxis=dict(showgrid=False, visible=False), yaxis=dict(showgrid=False, visible=False),
+        margin=dict(t=30, b=30)
+    )
+    return fig
+
+
+def competitor_figures(brand_similarity, brand):
+    """CLOSEST COMPETITORS bars (similarity in %) and the brand map (None = no vectors)."""
+    rivals = brand_similarity.competitors(brand, k=8)
+    if rivals.empty: return {'competitors': None, 'map': None}
+    percent = (rivals['similarity'] * 100).round().astype(int).sort_values(ascending=True)
+    return {
+        'competitors': hbar_figure(percent, '#D4AF37', 500, 1.5),
+        'map': map_figure(brand_similarity.projection_frame(), brand, rivals.index.tolist(), 500),
+    }
+
+
+# --- 2. BOUNDED FIGURE CACHE ---
+class FigureCache:
+    """Thread-safe LRU of built figures keyed by (scope, brand).
+
+    Built go.Figure objects are cached rather than JSON: st.plotly_chart
+    re-validates dict/JSON input (slower than building), while a Figure is only
+    serialized, so a cache hit costs one to_json per chart.
+    """
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        value = build()  # Built outside the lock; a concurrent duplicate build is harmless
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._items)
+
+
+def warm_up(cache, cubes, top_n):
+    """Pre-renders global charts and the top_n largest brands of every scope cube."""
+    for scope, cube in cubes.items():
+        cache.get((scope, None), lambda: global_figures(cube))
+        for brand in cube['brand_counts'].index[:top_n]:
+            cache.get((scope, brand), lambda: brand_figures(brand_profile(cube, brand)))
+
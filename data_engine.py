@@ -0,0 +1,427 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import hashlib
+import os
+
+# --- CONFIGURATION ---
+INPUT_FILE = 'aromo_english.csv'
+SNAPSHOT_SUFFIX = '_snapshot.arrow'  # aromo_english.csv -> aromo_english_snapshot.arrow
+
+# Bump whenever the derived columns below change, so stale snapshots are rebuilt
+SNAPSHOT_VERSION = '3'
+CATEGORY_COLUMNS = ['Brand', 'Main_Fam', 'Type_Raw', 'Segment_Raw']
+TEXT_COLUMNS = ['brand', 'name', 'display_name', 'notes_display', 'url']
+# Raw columns fully replaced by a derived one; dropped after prepare_frame
+RAW_DERIVED_COLUMNS = ['families', 'type', 'top_notes', 'year', 'segment']
+FINE_FRAGRANCE_PATTERN = 'Parfum|Toilette|Cologne|EdP|EdT'
+
+# MOST POPULAR NAME WORDS: 3+ letter words minus generic product vocabulary
+NAME_WORD_PATTERN = r'\b[a-zA-Z]{3,}\b'
+NAME_STOP_WORDS = frozenset(['eau', 'de', 'parfum', 'toilette', 'cologne', 'the', 'le', 'la', 'les', 'for', 'men', 'women', 'pour', 'homme', 'femme', 'intense', 'elixir', 'and', 'of', 'in', 'to', 'a', 'by', 'no', 'vol', 'ml', 'edp', 'edt', 'spray', 'water', 'collection', 'edition', 'unknown'])
+
+
+# --- 1. CSV PARSING & DERIVED COLUMNS ---
+def read_catalog_csv(file_path=INPUT_FILE):
+    """Parses the raw catalog exactly like the dashboard always has."""
+    # Explicit comma separator
+    df = pd.read_csv(file_path, sep=',', on_bad_lines='skip', engine='python')
+    df.columns = df.columns.str.lower().str.strip()
+    return df.dropna(subset=['brand'])
+
+
+def clean_brand(brands):
+    """Brand names as 1_data_pipeline.py stores them: stripped and title-cased."""
+    return brands.astype(str).str.strip().str.title()
+
+
+def main_family(families):
+    """First listed family, title-cased and stripped of list brackets."""
+    fams = families.astype('string[pyarrow]')
+    return (fams.str.replace(r'(?s),.*', '', regex=True).str.strip().str.title()
+            .str.replace("['", "", regex=False).str.replace("']", "", regex=False)).astype(object)
+
+
+def truncate_notes(notes, width=60):
+    """Card preview of the notes string."""
+    short = notes.astype('string[pyarrow]')
+    return short.where(short.str.len() <= width, short.str[:width] + "...").astype(object)
+
+
+def split_notes(notes):
+    """Comma-separated notes -> list of stripped, non-empty notes per row.
+
+    Runs in Arrow compute kernels: split, flatten, trim and drop empties on one
+    flat array, then rebuild the per-row lists from offsets. The lists hold
+    int32 codes into one sorted note vocabulary (Arrow list<dictionary>), i.e.
+    CSR offsets + codes with no Python string per note; see note_csr().
+    """
+    arr = pa.array(notes.to_numpy(dtype=object), type=pa.string())
+    lists = pc.split_pattern(arr, ',')
+    flat = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+    parents = pc.list_parent_indices(lists).to_numpy()
+    keep = pc.not_equal(flat, '').to_numpy(zero_copy_only=False)
+
+    # Dictionary-encode, then sort the vocabulary so codes follow alphabetical order
+    encoded = pc.filter(flat, pa.array(keep)).dictionary_encode()
+    order = pc.array_sort_indices(encoded.dictionary).to_numpy()
+    rank = np.empty(len(order), dtype=np.int32)
+    rank[order] = np.arange(len(order), dtype=np.int32)
+    codes = rank[encoded.indices.to_numpy(zero_copy_only=False)] if len(order) else np.zeros(0, np.int32)
+    values = pa.DictionaryArray.from_arrays(pa.array(codes, pa.int32()), encoded.dictionary.take(pa.array(order)))
+
+    counts = np.bincount(parents[keep], minlength=len(notes))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+    rebuilt = pa.ListArray.from_arrays(pa.array(offsets), values)
+    return pd.Series(pd.arrays.ArrowExtensionArray(rebuilt), index=notes.index)
+
+
+def note_csr(df):
+    """(offsets, codes, vocab) of the notes: row i has vocab[codes[offsets[i]:offsets[i + 1]]]."""
+    lists = pa.array(df['notes_list'].array)
+    chunks = lists.chunks if isinstance(lists, pa.ChunkedArray) else [lists]
+    lengths = [pc.list_value_length(c).to_numpy(zero_copy_only=False) for c in chunks]
+    offsets = np.concatenate([[0], np.cumsum(np.concatenate(lengths or [[]]))]).astype(np.int64)
+
+    flats = [c.flatten() for c in chunks]
+    dictionaries = [f.dictionary for f in flats]
+    if all(d.equals(dictionaries[0]) for d in dictionaries):
+        # Usual case: every chunk shares the vocabulary written by split_notes
+        vocab = np.asarray(dictionaries[0].to_pylist() if dictionaries else [], dtype=object)
+        codes = [f.indices.to_numpy(zero_copy_only=False) for f in flats]
+    else:
+        vocab = np.unique(np.concatenate([np.asarray(d.to_pylist(), dtype=object) for d in dictionaries]).astype(str)).astype(object)
+        codes = [np.searchsorted(vocab, np.asarray(f.dictionary.to_pylist(), dtype=object))[f.indices.to_numpy(zero_copy_only=False)]
+                 for f in flats]
+    codes = np.concatenate(codes).astype(np.int32) if codes else np.zeros(0, np.int32)
+    return offsets, codes, vocab
+
+
+def prepare_frame(df):
+    """Adds the display columns used by app.py (Brand, Main_Fam, notes_list, ...)."""
+    df = df.copy()
+
+    # Clean Data
+    df['Brand'] = df['brand'].astype(str).str.strip().str.lstrip("#*-").str.title()
+    df['display_name'] = df['name'].astype(str).str.strip() if 'name' in df.columns else "Unknown"
+    df['Type_Raw'] = df['type'].astype(str).str.strip() if 'type' in df.columns else "Fragrance"
+
+    # Year
+    if 'year' in df.columns:
+        df['year_clean'] = pd.to_numeric(df['year'], errors='coerce').fillna(0).astype(int)
+    else: df['year_clean'] = 0
+
+    # Segment
+    df['Segment_Raw'] = df['segment'].astype(str) if 'segment' in df.columns else "Unknown"
+
+    # Families
+    if 'families' in df.columns:
+        df['families'] = df['families'].astype(str).replace('nan', 'Unknown')
+        df['Main_Fam'] = main_family(df['families'])
+    else: df['Main_Fam'] = "Unknown"
+
+    # Notes
+    notes = df['top_notes'].astype(str).replace('nan', '') if 'top_notes' in df.columns else pd.Series("", index=df.index)
+    df['notes_display'] = truncate_notes(notes)
+    df['notes_list'] = split_notes(notes)
+
+    df['url'] = df['url'] if 'url' in df.columns else "#"
+
+    # Compact storage: labels as category codes, free text as Arrow strings
+    # (no Python object per cell) and no raw copies of the derived columns
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    for col in TEXT_COLUMNS:
+        if col in df.columns: df[col] = df[col].astype('string[pyarrow]')
+    df = df.drop(columns=[c for c in RAW_DERIVED_COLUMNS if c in df.columns])
+    return df.reset_index(drop=True)
+
+
+def build_note_table(df):
+    """Long brand-note table (one row per perfume x note), straight from the note codes."""
+    offsets, codes, vocab = note_csr(df)
+    rows = np.repeat(np.arange(len(df), dtype=np.int32), np.diff(offsets))
+    brand = df['Brand'].array
+    return pd.DataFrame({
+        'row': rows,
+        'Brand': pd.Categorical.from_codes(brand.codes[rows], brand.categories),
+        'note': pd.Categorical.from_codes(codes, vocab),
+    })
+
+
+def brand_note_counts(notes_long, row_mask=None):
+    """Note frequencies per brand: (Brand, note) -> count, busiest notes first.
+
+    row_mask is an optional boolean array over the catalog rows (e.g. a sidebar scope).
+    """
+    if row_mask is not None:
+        notes_long = notes_long[np.asarray(row_mask)[notes_long['row'].to_numpy()]]
+    return _desc_within_brand(_pair_counts(notes_long['Brand'], notes_long['note'], first_seen=True))
+
+
+def tokenize_names(names):
+    """Name words, one entry per (row, word), capitalized and without stop words."""
+    words = names.astype(str).str.lower().str.findall(NAME_WORD_PATTERN).explode().dropna()
+    words = words[~words.isin(NAME_STOP_WORDS)]
+    return words.str.capitalize()
+
+
+def build_name_tokens(df):
+    """Long row-word table from display_name, tokenized once per dataset."""
+    words = tokenize_names(df['display_name'])
+    return pd.DataFrame({
+        'row': words.index.to_numpy(),
+        'word': words.astype('category').array,
+    })
+
+
+def count_name_words(name_tokens, row_mask=None):
+    """Word frequencies (descending) for a scope of the long row-word table."""
+    if row_mask is not None:
+        name_tokens = name_tokens[np.asarray(row_mask)[name_tokens['row'].to_numpy()]]
+    return _desc(_code_counts(name_tokens['word']))
+
+
+def extend_name_tokens(name_tokens, names, start):
+    """Incremental update: appends the words of rows start.. (rows added at the end) to the row-word table."""
+    words = tokenize_names(names.iloc[start:])
+    return pd.DataFrame({
+        'row': np.concatenate([name_tokens['row'].to_numpy(), words.index.to_numpy()]),
+        'word': union_categoricals([name_tokens['word'].array, words.astype('category').array]),
+    })
+
+
+def scope_mask(df, filter_mode):
+    """Boolean row mask for the sidebar SCOPE ("All Products" / "Fine Fragrance Only")."""
+    if filter_mode == "Fine Fragrance Only":
+        mask = df['Type_Raw'].str.contains(FINE_FRAGRANCE_PATTERN, case=False, na=False).to_numpy()
+    else:
+        mask = np.ones(len(df), dtype=bool)
+    mask.flags.writeable = False
+    return mask
+
+
+def scope_view(df, filter_mode):
+    """Rows in scope, without copying when the scope is the whole catalog.
+
+    The result is meant to be shared between sessions, so callers must treat
+    it as read-only.
+    """
+    mask = scope_mask(df, filter_mode)
+    return df if mask.all() else df[mask]
+
+
+# --- 2. AGGREGATE CUBE ---
+CARD_COLUMNS = ['display_name', 'Type_Raw', 'year_clean', 'notes_display', 'url']
+
+
+def _codes(labels):
+    """(codes, index, keep) of a column: category codes, or positions in its sorted distinct values.
+
+    Plain columns such as year_clean are factorized first, so any value (negative,
+    or a typo like 2.5e9) costs one slot per distinct value instead of a bincount
+    slot per possible value.
+    """
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        codes, index = labels.cat.codes.to_numpy().astype(np.int64), labels.cat.categories
+        keep = codes >= 0
+        return codes, index, keep
+    values = labels.to_numpy()
+    keep = ~pd.isna(values)
+    uniques, codes = np.unique(values[keep], return_inverse=True)
+    full = np.full(len(values), -1, dtype=np.int64)
+    full[keep] = codes
+    return full, pd.Index(uniques), keep
+
+
+def _code_counts(labels):
+    """value_counts of a column as one bincount over its codes; observed labels in first-seen order."""
+    codes, index, keep = _codes(labels)
+    counts = np.bincount(codes[keep], minlength=len(index))
+    seen = pd.unique(codes[keep])  # Hash pass, in order of appearance
+    return pd.Series(counts[seen], index=index.take(seen).rename(labels.name), name='count')
+
+
+def _pair_counts(brands, labels, first_seen=False):
+    """(Brand, label) -> count over observed pairs, index sorted like a groupby.
+
+    With first_seen, pairs are in order of first appearance instead, so a later
+    stable sort by count keeps ties the way value_counts()/Counter listed them.
+    """
+    b_codes = brands.cat.codes.to_numpy().astype(np.int64)
+    l_codes, l_index, keep = _codes(labels)
+    keep &= b_codes >= 0
+    b_codes, l_codes = b_codes[keep], l_codes[keep]
+    keys = b_codes * max(len(l_index), 1) + l_codes
+    if first_seen:
+        pair_codes, keys = pd.factorize(keys)
+        counts = np.bincount(pair_codes, minlength=len(keys))
+    else:
+        keys, counts = np.unique(keys, return_counts=True)
+    index = pd.MultiIndex.from_arrays([
+        pd.Categorical.from_codes(keys // max(len(l_index), 1), brands.cat.categories),
+        l_index.take(keys % max(len(l_index), 1)),
+    ], names=[brands.name, labels.name])
+    return pd.Series(counts, index=index)
+
+
+def _desc(counts):
+    """Drops unobserved labels and orders by count (stable: ties keep the input's first-seen order)."""
+    counts = counts[counts > 0]
+    return counts.sort_values(ascending=False, kind='stable')
+
+
+def _desc_within_brand(counts):
+    counts = counts.sort_values(ascending=False, kind='stable')
+    return counts.sort_index(level='Brand', sort_remaining=False, kind='stable')
+
+
+def build_market_cube(df, notes_long, name_tokens, row_mask=None):
+    """Precomputes every count behind the dashboard charts for one scope.
+
+    Global views read whole Series; brand views are sorted (Brand, key) Series,
+    so one brand is a single index lookup. Built once per dataset and scope.
+    """
+    view = df if row_mask is None else df[np.asarray(row_mask)]
+    by_brand = view.groupby('Brand', observed=True)
+
+    latest = view.sort_values('year_clean', ascending=False, kind='stable')
+    latest = latest.groupby('Brand', observed=True).head(4).assign(row=lambda x: x.index)
+
+    return {
+        'n_rows': len(view),
+        'brand_counts': _desc(_code_counts(view['Brand'])),
+        'family_counts': _desc(_code_counts(view['Main_Fam'])),
+        'year_counts': _desc(_code_counts(view['year_clean'])),
+        'brand_segment': by_brand['Segment_Raw'].first(),
+        'brand_latest': latest.set_index('Brand')[CARD_COLUMNS + ['row']].sort_index(kind='stable'),
+        'brand_years': _pair_counts(view['Brand'], view['year_clean']),
+        'brand_families': _desc_within_brand(_pair_counts(view['Brand'], view['Main_Fam'], first_seen=True)),
+        'brand_notes': brand_note_counts(notes_long, row_mask),
+        'name_words': count_name_words(name_tokens, row_mask),
+    }
+
+
+def _brand_slice(data, brand):
+    try: return data.loc[brand]
+    except KeyError: return data.iloc[:0]
+
+
+def brand_profile(cube, brand):
+    """All Brand Analysis aggregates for one brand (empty results for unknown brands)."""
+    latest = cube['brand_latest']
+    return {
+        'count': int(cube['brand_counts'].get(brand, 0)),
+        'segment': cube['brand_segment'].get(brand),
+        'latest': latest.loc[[brand]] if brand in latest.index else latest.iloc[:0],
+        'years': _brand_slice(cube['brand_years'], brand),
+        'families': _brand_slice(cube['brand_families'], brand),
+        'notes': _brand_slice(cube['brand_notes'], brand),
+    }
+
+
+# --- 3. COLUMNAR SNAPSHOT ---
+def snapshot_path(csv_file=INPUT_FILE):
+    """Snapshot file of a dataset CSV: next to it, named after it."""
+    return os.path.splitext(csv_file)[0] + SNAPSHOT_SUFFIX
+
+
+def write_snapshot(df, snapshot_file, source=None):
+    """Writes a prepared frame as an uncompressed Arrow IPC file (memory-mappable).
+
+    source is the CSV the frame was parsed from; its content version is stored so
+    read_snapshot only serves the snapshot for those exact contents.
+    """
+    # Mixed object columns are stored as text to keep the schema typed
+    out = df.copy()
+    for col in out.columns:
+        if out[col].dtype == object:
+            out[col] = out[col].where(out[col].isna(), out[col].astype(str))
+
+    table = pa.Table.from_pandas(out, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[b'aromo_snapshot_version'] = SNAPSHOT_VERSION.encode()
+    if source is not None:
+        meta[b'aromo_dataset_version'] = (dataset_version(source) or '').encode()
+    table = table.replace_schema_metadata(meta)
+
+    # Write to a temp file first so readers never see a half-written snapshot
+    tmp_file = snapshot_file + '.tmp'
+    feather.write_feather(table, tmp_file, compression='uncompressed')
+    os.replace(tmp_file, snapshot_file)
+
+
+def read_snapshot(snapshot_file, source=None):
+    """Memory-maps the snapshot; None if it has an older format or was built from other data.
+
+    With source, the snapshot must have been written for the file's current
+    contents (dataset_version), so a restored snapshot whose mtime looks fresh is
+    never served for different data. The path is not checked: a snapshot shipped
+    with the repo (LFS) or copied next to an identical CSV is still used.
+    """
+    table = feather.read_table(snapshot_file, memory_map=True)
+    meta = table.schema.metadata or {}
+    if meta.get(b'aromo_snapshot_version') != SNAPSHOT_VERSION.encode():
+        return None
+    if source is not None:
+        version = dataset_version(source)
+        if version is not None and meta.get(b'aromo_dataset_version') != version.encode(): return None
+    return table.to_pandas(types_mapper=_compact_dtype)
+
+
+def _compact_dtype(arrow_type):
+    # Strings and note lists stay Arrow-backed (read straight from the mapped file)
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    if pa.types.is_list(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def build_snapshot(input_file=INPUT_FILE, snapshot_file=None):
+    """Build step: parse the CSV once and store all derived columns (tagged with the CSV)."""
+    df = prepare_frame(read_catalog_csv(input_file))
+    write_snapshot(df, snapshot_file or snapshot_path(input_file), source=input_file)
+    return df
+
+
+# --- 4. ENTRY POINT FOR THE DASHBOARD ---
+def load_catalog(csv_file=INPUT_FILE, snapshot_file=None):
+    """Returns (df, status). Prefers the snapshot of csv_file, falls back to parsing the CSV."""
+    snapshot_file = snapshot_file or snapshot_path(csv_file)
+    if os.path.exists(snapshot_file):
+        try:
+            df = read_snapshot(snapshot_file, source=csv_file)
+            if df is not None: return df, "OK"
+        except Exception:
+            pass  # Corrupt or unreadable snapshot -> rebuild from CSV below
+
+    if not os.path.exists(csv_file): return pd.DataFrame(), "FILE_NOT_FOUND"
+    try:
+        return prepare_frame(read_catalog_csv(csv_file)), "OK"
+    except Exception as e: return pd.DataFrame(), str(e)
+
+
+# --- 5. DATASET VERSION ---
+_version_memo = {}
+
+
+def dataset_version(csv_file=INPUT_FILE):
+    """Short content hash identifying one release of the dataset (None if the file is missing).
+
+    The file is only re-hashed when its size or mtime changes, so polling it is cheap.
+    """
+    try: stat = os.stat(csv_file)
+    except FileNotFoundError: return None
+    key = (stat.st_size, stat.st_mtime_ns)
+    memo = _version_memo.get(csv_file)
+    if memo is None or memo[0] != key:
+        digest = hashlib.sha1()
+        with open(csv_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        memo = _version_memo[csv_file] = (key, digest.hexdigest()[:12])
+    return memo[1]
@@ -0,0 +1,62 @@
+import threading
+
+from data_engine import dataset_version
+
+# --- CONFIGURATION ---
+RELOAD_INTERVAL = 30  # seconds between checks of the dataset file
+
+
+class DatasetWatcher:
+    """Polls the dataset file and publishes a new version only once it is warm.
+
+    warm(version) must build every version-keyed cache; it runs on the watcher
+    thread, so sessions keep serving the current version meanwhile. Readers
+    take `watcher.version` once per rerun and the swap is a single attribute
+    assignment, so a rerun in flight never mixes two versions.
+    """
+
+    def __init__(self, path, warm, interval=RELOAD_INTERVAL):
+        self.path = path
+        self.warm = warm
+        self.interval = interval
+        self.version = dataset_version(path)
+        self._pending = None
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='dataset-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """One poll; returns True when a new version went live."""
+        try: candidate = dataset_version(self.path)
+        except OSError: return False  # Replaced between stat and read; next poll sees the new file
+        # A missing file keeps the current version; a broken one is not retried until it changes
+        if candidate is None or candidate in (self.version, self._failed):
+            self._pending = None
+            return False
+        if candidate != self._pending:
+            # First sighting: wait one more interval so a file still being written settles
+            self._pending = candidate
+            return False
+
+        try:
+            self.warm(candidate)
+        except Exception as e:
+            self._failed = candidate
+            print(f"[WARN] Dataset version {candidate} failed to load, still serving {self.version}: {e}")
+            return False
+        self.version = candidate
+        self._pending = None
+        print(f"[INFO] Dataset version {candidate} is live")
+        return True
@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+
+from data_engine import clean_brand
+from similarity import normalize_rows
+
+# --- CONFIGURATION ---
+# aromo_embeddings.npy        raw float32/float16 matrix, opened with mmap so every
+#                             worker process shares one page-cached copy
+# aromo_embeddings_index.arrow one row per vector: row key + perfume metadata
+# aromo_embeddings.json       model, dtype, shape (written last = commit marker)
+STORE_PREFIX = 'aromo_embeddings'
+STORE_FORMAT = 2  # 2: brand keys normalized like the cleaned CSV
+INDEX_COLUMNS = ['brand', 'name', 'year', 'url']
+
+
+def store_paths(prefix=STORE_PREFIX):
+    return prefix + '.npy', prefix + '_index.arrow', prefix + '.json'
+
+
+def catalog_keys(df):
+    """Stable 64-bit row identity from the (brand, name, url) columns.
+
+    Used to line vectors up with any copy of the catalog, whatever its row order.
+    The brand is normalized like 1_data_pipeline.py does, so a store built from
+    the raw export matches the cleaned file and vice versa.
+    """
+    cols = [c for c in ('brand', 'name', 'url') if c in df.columns]
+    key = df[cols].fillna('').astype(str).apply(lambda s: s.str.strip())
+    if 'brand' in key.columns: key['brand'] = clean_brand(key['brand'])
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def write_embedding_store(vectors, catalog, model_name, prefix=STORE_PREFIX, dtype='float32'):
+    """Saves vectors + their row index. catalog holds the rows the vectors were built from.
+
+    Rows are normalized before the cast to dtype, so readers can use the memory
+    map in place (also for float16) instead of each making a normalized copy.
+    """
+    vectors = np.ascontiguousarray(normalize_rows(np.asarray(vectors, dtype=np.float32)), dtype=dtype)
+    if len(vectors) != len(catalog):
+        raise ValueError(f"{len(vectors)} vectors for {len(catalog)} catalog rows")
+
+    index = catalog[[c for c in INDEX_COLUMNS if c in catalog.columns]].astype(str).reset_index(drop=True)
+    index.insert(0, 'key', catalog_keys(catalog))
+
+    vec_file, index_file, meta_file = store_paths(prefix)
+    np.save(vec_file + '.tmp.npy', vectors)
+    os.replace(vec_file + '.tmp.npy', vec_file)
+    index.to_feather(index_file + '.tmp')
+    os.replace(index_file + '.tmp', index_file)
+
+    meta = {'format': STORE_FORMAT, 'model': model_name, 'dtype': str(vectors.dtype),
+            'count': int(vectors.shape[0]), 'dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0}
+    with open(meta_file + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_file + '.tmp', meta_file)
+    return meta
+
+
+def load_embedding_store(prefix=STORE_PREFIX):
+    """Returns (vectors, index, meta); vectors is a read-only memory map.
+
+    Raises FileNotFoundError if the store has not been built (run 2_ai_engine.py)
+    and ValueError if it was built by an older version (its row keys differ).
+    """
+    vec_file, index_file, meta_file = store_paths(prefix)
+    with open(meta_file) as f:
+        meta = json.load(f)
+    if meta.get('format') != STORE_FORMAT:
+        raise ValueError(f"Embedding store '{prefix}' has format {meta.get('format')}, rebuild it with 2_ai_engine.py")
+    vectors = np.load(vec_file, mmap_mode='r')
+    index = pd.read_feather(index_file)
+    if vectors.shape[0] != meta['count'] or len(index) != meta['count']:
+        raise ValueError(f"Embedding store '{prefix}' is inconsistent (partial write?)")
+    return vectors, index, meta
+
+
+def embedding_version(prefix=STORE_PREFIX):
+    """Changes whenever the store is rewritten (None if it does not exist)."""
+    vec_file, _, meta_file = store_paths(prefix)
+    try:
+        stats = [os.stat(vec_file), os.stat(meta_file)]
+    except FileNotFoundError:
+        return None
+    key = ':'.join(f'{s.st_size}-{s.st_mtime_ns}' for s in stats)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def align_rows(index, df):
+    """Store row for every row of df (-1 where the perfume has no vector)."""
+    lookup = pd.Series(np.arange(len(index)), index=index['key'].to_numpy())
+    lookup = lookup[~lookup.index.duplicated()]
+    return lookup.reindex(catalog_keys(df)).fillna(-1).astype(np.int64).to_numpy()
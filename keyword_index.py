@@ -0,0 +1,160 @@
+import numpy as np
+import os
+import re
+
+from data_engine import note_csr
+
+# --- CONFIGURATION ---
+KEYWORD_INDEX_SUFFIX = '_keywords.npz'  # aromo_english.csv -> aromo_english_keywords.npz
+INDEX_FORMAT = 2
+
+# Field weights: an exact note or brand hit counts more than a word in the name
+FIELD_WEIGHTS = {'notes_list': 2.0, 'Brand': 1.5, 'Main_Fam': 1.5, 'display_name': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def keyword_index_path(csv_file):
+    """Serialized index of a dataset CSV: next to it, named after it."""
+    return os.path.splitext(csv_file)[0] + KEYWORD_INDEX_SUFFIX
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def _note_tokens(df):
+    """(row, token) pairs of the notes, tokenizing each distinct note once."""
+    offsets, codes, vocab = note_csr(df)
+    vocab_tokens = [tokenize(note) for note in vocab.tolist()]
+    n_tokens = np.array([len(t) for t in vocab_tokens], dtype=np.int64)
+    tok_start = np.concatenate([[0], np.cumsum(n_tokens)])
+    flat_tokens = np.array([t for toks in vocab_tokens for t in toks], dtype=object)
+
+    # Expand every note occurrence into its token range of flat_tokens
+    per_note = n_tokens[codes]
+    rows = np.repeat(np.repeat(np.arange(len(df)), np.diff(offsets)), per_note)
+    starts = np.repeat(tok_start[codes] - np.concatenate([[0], np.cumsum(per_note)[:-1]]), per_note)
+    return rows.tolist(), flat_tokens[starts + np.arange(len(rows))].tolist()
+
+
+def _field_tokens(df, field):
+    """(row, token) pairs of one field; notes_list holds several notes per row."""
+    if field == 'notes_list': return _note_tokens(df)
+    rows, texts = np.arange(len(df)), df[field].astype(str).tolist()
+    pairs_rows, pairs_tokens = [], []
+    for row, text in zip(rows.tolist(), texts):
+        for tok in tokenize(text):
+            pairs_rows.append(row)
+            pairs_tokens.append(tok)
+    return pairs_rows, pairs_tokens
+
+
+class KeywordIndex:
+    """BM25 inverted index over notes, names, brands and families.
+
+    Postings are stored CSR-style (term offsets into doc/weight arrays) with the
+    BM25 weight of every posting precomputed, so a query only touches the
+    postings of its own terms.
+    """
+
+    def __init__(self, vocab, offsets, docs, weights, n_docs):
+        self.vocab = vocab
+        self.term_ids = {t: i for i, t in enumerate(vocab.tolist())}
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.n_docs = n_docs
+
+    # --- BUILD ---
+    @classmethod
+    def build(cls, df):
+        rows, tokens, field_w = [], [], []
+        for field, weight in FIELD_WEIGHTS.items():
+            if field not in df.columns: continue
+            r, t = _field_tokens(df, field)
+            rows += r
+            tokens += t
+            field_w.append(np.full(len(r), weight, dtype=np.float32))
+        n_docs = len(df)
+        if not tokens:
+            return cls(np.array([], dtype=str), np.zeros(1, dtype=np.int64),
+                       np.array([], dtype=np.int32), np.array([], dtype=np.float32), n_docs)
+
+        vocab, term = np.unique(np.array(tokens, dtype=object).astype(str), return_inverse=True)
+        rows = np.asarray(rows, dtype=np.int64)
+        field_w = np.concatenate(field_w)
+
+        # Weighted term frequency per (term, doc)
+        pair = term.astype(np.int64) * n_docs + rows
+        uniq, inverse = np.unique(pair, return_inverse=True)
+        tf = np.bincount(inverse, weights=field_w).astype(np.float32)
+        p_term, p_doc = uniq // n_docs, uniq % n_docs
+
+        doc_len = np.bincount(rows, weights=field_w, minlength=n_docs)
+        avg_len = doc_len.mean() if n_docs else 1.0
+        df_term = np.bincount(p_term, minlength=len(vocab))
+        idf = np.log1p((n_docs - df_term + 0.5) / (df_term + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[p_doc] / max(avg_len, 1e-9))
+        weights = (idf[p_term] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        offsets = np.concatenate([[0], np.cumsum(df_term)]).astype(np.int64)
+        return cls(vocab, offsets, p_doc.astype(np.int32), weights, n_docs)
+
+    # --- SERIALIZATION ---
+    def save(self, path, source_version=''):
+        """source_version: dataset_version() of the CSV the rows came from (checked by load_or_build)."""
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, format=INDEX_FORMAT, vocab=self.vocab, offsets=self.offsets,
+                     docs=self.docs, weights=self.weights, n_docs=self.n_docs, source_version=source_version or '')
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Returns (index, source_version)."""
+        with np.load(path) as data:
+            if int(data['format']) != INDEX_FORMAT:
+                raise ValueError(f"Keyword index '{path}' has an outdated format")
+            index = cls(data['vocab'], data['offsets'], data['docs'], data['weights'], int(data['n_docs']))
+            return index, str(data['source_version'])
+
+    # --- QUERY ---
+    def postings(self, term):
+        i = self.term_ids.get(term)
+        if i is None: return self.docs[:0], self.weights[:0]
+        return self.docs[self.offsets[i]:self.offsets[i + 1]], self.weights[self.offsets[i]:self.offsets[i + 1]]
+
+    def search(self, query, k=10, mode='or'):
+        """Top-k (rows, scores). mode='and' keeps only rows containing every query term."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        lists = [self.postings(t) for t in terms]
+        if not lists or (mode == 'and' and any(len(d) == 0 for d, _ in lists)):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+
+        docs = np.concatenate([d for d, _ in lists])
+        weights = np.concatenate([w for _, w in lists])
+        rows, inverse, hits = np.unique(docs, return_inverse=True, return_counts=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        if mode == 'and':
+            keep = hits == len(terms)
+            rows, scores = rows[keep], scores[keep]
+
+        k = min(k, len(rows))
+        if k == 0: return rows.astype(np.int64), scores
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return rows[top].astype(np.int64), scores[top]
+
+
+def load_or_build(df, path, source_version):
+    """Loads the prebuilt index when it was built from this dataset version, else builds it."""
+    if os.path.exists(path):
+        try:
+            index, built_from = KeywordIndex.load(path)
+            if built_from == (source_version or '') and index.n_docs == len(df): return index
+        except (OSError, KeyError, ValueError):
+            pass
+    return KeywordIndex.build(df)
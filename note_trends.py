@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from data_engine import note_csr
+
+
+class NoteMatrix:
+    """Sparse perfume x note incidence with the note-pair and note-year tables derived from it.
+
+    Built once per dataset and scope from the CSR note codes: X is perfumes x notes
+    (1 = perfume lists the note), cooccurrence = X.T @ X and note_years = X.T @ Y
+    with Y the perfume x release-year indicator. Both products stay sparse, so
+    memory follows the number of distinct pairs, never notes x notes or rows x notes.
+    """
+
+    def __init__(self, df, row_mask=None):
+        offsets, codes, vocab = note_csr(df)
+        n_rows = len(df)
+        x = sp.csr_matrix((np.ones(len(codes), dtype=np.int32), codes, offsets), shape=(n_rows, len(vocab)))
+        x.sum_duplicates()
+        x.data[:] = 1  # A note listed twice in one perfume still counts once
+
+        years = df['year_clean'].to_numpy()
+        keep = years > 0  # 0 = unknown release year
+        if row_mask is not None:
+            row_mask = np.asarray(row_mask)
+            x = x[row_mask]
+            years, keep = years[row_mask], keep[row_mask]
+        self.years = np.unique(years[keep])
+        year_codes = np.searchsorted(self.years, years[keep])
+        y = sp.csr_matrix((np.ones(len(year_codes), dtype=np.int32), (np.flatnonzero(keep), year_codes)),
+                          shape=(x.shape[0], len(self.years)))
+
+        self.vocab = vocab
+        self.note_ids = {note: i for i, note in enumerate(vocab.tolist())}
+        self.n_perfumes = x.shape[0]
+        xt = x.T.tocsr()
+        self.cooccurrence = (xt @ x).tocsr()
+        self.note_years = (xt @ y).tocsr()
+        self.note_counts = np.asarray(x.sum(axis=0)).ravel()
+        self.year_totals = np.bincount(year_codes, minlength=len(self.years))
+
+    def top_notes(self, k=None):
+        """Notes by number of perfumes listing them, busiest first."""
+        counts = pd.Series(self.note_counts, index=self.vocab, name='perfumes')
+        counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+        return counts if k is None else counts.head(k)
+
+    def pairings(self, note, k=10):
+        """Notes most often listed together with `note`.
+
+        Returns a frame indexed by partner note: count (shared perfumes), share
+        (fraction of `note` perfumes that also list the partner) and lift
+        (share relative to how common the partner is overall; > 1 = affinity).
+        """
+        i = self.note_ids.get(note)
+        if i is None or self.note_counts[i] == 0:
+            return pd.DataFrame(columns=['count', 'share', 'lift'])
+        row = self.cooccurrence[i]
+        partners, counts = row.indices, row.data
+        keep = partners != i
+        partners, counts = partners[keep], counts[keep]
+        top = np.lexsort((partners, -counts))[:k]  # Count desc, ties alphabetical
+        partners, counts = partners[top], counts[top]
+        share = counts / self.note_counts[i]
+        lift = share / (self.note_counts[partners] / self.n_perfumes)
+        return pd.DataFrame({'count': counts, 'share': share, 'lift': lift}, index=self.vocab[partners])
+
+    def trend(self, notes, start=None, end=None):
+        """Share of each year's releases listing each note (years as index, notes as columns)."""
+        years = self.years
+        span = np.ones(len(years), dtype=bool)
+        if start is not None: span &= years >= start
+        if end is not None: span &= years <= end
+        totals = np.maximum(self.year_totals[span], 1)
+        out = {}
+        for note in notes:
+            i = self.note_ids.get(note)
+            if i is None: continue
+            counts = self.note_years[i].toarray().ravel()[span]
+            out[note] = counts / totals
+        return pd.DataFrame(out, index=pd.Index(years[span], name='year'))
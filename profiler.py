@@ -0,0 +1,116 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# --- CONFIGURATION ---
+MAX_SAMPLES = 1000  # most recent samples kept per block; older ones are dropped
+
+
+class Block:
+    """Times one named section. Use as `with PROFILER.block(name):` or start()/stop()."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def start(self):
+        self._blocks = sys.getallocatedblocks()
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        elapsed = time.perf_counter() - self._start
+        self.profiler.record(self.name, elapsed, sys.getallocatedblocks() - self._blocks)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class Profiler:
+    """Process-wide timing samples per block, shared by every session.
+
+    Allocations are the change in CPython's allocated memory blocks across the
+    block: cheap enough to leave on, but process-wide, so concurrent sessions
+    blur each other's numbers.
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def block(self, name):
+        return Block(self, name)
+
+    def timed(self, name=None):
+        """Decorator version of block(); defaults to the function name."""
+        def decorate(fn):
+            label = name or fn.__name__
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.block(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds, blocks=0):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.max_samples)
+                self._totals[name] = [0, 0.0]
+            self._samples[name].append((seconds, blocks))
+            self._totals[name][0] += 1
+            self._totals[name][1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    # --- EXPORT ---
+    def summary(self):
+        """{block: count, total_s, p50_ms, p95_ms, max_ms, alloc_blocks_p50} over the recent samples."""
+        import numpy as np  # Only the debug panel needs it; keeps `import profiler` off the app's startup path
+        with self._lock:
+            snapshot = {name: (np.array(list(s)), list(self._totals[name])) for name, s in self._samples.items()}
+        out = {}
+        for name, (samples, (count, total)) in sorted(snapshot.items()):
+            ms = samples[:, 0] * 1000
+            out[name] = {
+                'count': count,
+                'total_s': round(total, 4),
+                'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                'max_ms': round(float(ms.max()), 3),
+                'alloc_blocks_p50': int(np.percentile(samples[:, 1], 50)),
+            }
+        return out
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix='aromo_block'):
+        """Prometheus text exposition format (summary type with 0.5/0.95 quantiles)."""
+        lines = [f'# HELP {prefix}_seconds Wall time per instrumented app block.',
+                 f'# TYPE {prefix}_seconds summary']
+        allocs = [f'# HELP {prefix}_alloc_blocks Median change in allocated memory blocks per block run.',
+                  f'# TYPE {prefix}_alloc_blocks gauge']
+        for name, s in self.summary().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{prefix}_seconds{{block="{label}",quantile="0.5"}} {s["p50_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_seconds{{block="{label}",quantile="0.95"}} {s["p95_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_seconds_sum{{block="{label}"}} {s["total_s"]:.6f}')
+            lines.append(f'{prefix}_seconds_count{{block="{label}"}} {s["count"]}')
+            allocs.append(f'{prefix}_alloc_blocks{{block="{label}"}} {s["alloc_blocks_p50"]}')
+        return '\n'.join(lines + allocs) + '\n'
+
+
+PROFILER = Profiler()
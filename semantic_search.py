@@ -0,0 +1,120 @@
+import numpy as np
+import re
+import threading
+import time
+from functools import lru_cache
+
+# --- CONFIGURATION ---
+QUERY_CACHE_SIZE = 4096  # distinct normalized queries kept in memory per process
+
+_models = {}
+_failed = {}  # model name -> why the background load failed
+_model_lock = threading.Lock()
+
+
+def get_model(model_name):
+    """One SentenceTransformer per process, loaded on first use."""
+    with _model_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+
+def warm_model(model_name):
+    """Loads the model on a daemon thread so the first query does not wait for it."""
+    def load():
+        try: get_model(model_name)
+        except Exception as e:
+            _failed[model_name] = f"{type(e).__name__}: {e}"
+            print(f"[WARN] Could not load the {model_name} model: {e}")
+    thread = threading.Thread(target=load, name='model-warm', daemon=True)
+    thread.start()
+    return thread
+
+
+def model_ready(model_name):
+    return model_name in _models
+
+
+def model_error(model_name):
+    """Why the background load failed (None while loading or once loaded)."""
+    return _failed.get(model_name)
+
+
+def normalize_query(text):
+    # all-MiniLM-L6-v2 is uncased, so case and spacing never change the vector
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class QueryEncoder:
+    """Encodes search queries with an LRU cache keyed by normalized query text."""
+
+    def __init__(self, model_name, cache_size=QUERY_CACHE_SIZE):
+        self.model_name = model_name
+        self._cached = lru_cache(maxsize=cache_size)(self._encode_uncached)
+
+    def _encode_uncached(self, normalized):
+        vec = get_model(self.model_name).encode([normalized], normalize_embeddings=True)[0]
+        vec = np.asarray(vec, dtype=np.float32)
+        vec.flags.writeable = False  # shared between sessions via the cache
+        return vec
+
+    def encode(self, query):
+        """Returns (vector, cache_hit)."""
+        hits = self._cached.cache_info().hits
+        vec = self._cached(normalize_query(query))
+        return vec, self._cached.cache_info().hits > hits
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+
+def semantic_search(engine, encoder, query, k=10, n_probe=8):
+    """Ranks catalog items for a free-text query.
+
+    Returns (item ids, scores, timings) where timings reports encode vs. search
+    milliseconds and whether the query vector came from the cache.
+    """
+    start = time.perf_counter()
+    vec, cached = encoder.encode(query)
+    encoded = time.perf_counter()
+    if engine.centroids is not None:
+        ids, scores = engine.search_ivf(vec, k, n_probe=n_probe)
+    else:
+        ids, scores = engine.search(vec, k)
+    done = time.perf_counter()
+    found = ids[0] >= 0
+    timings = {'encode_ms': (encoded - start) * 1000, 'search_ms': (done - encoded) * 1000, 'cached': cached}
+    return ids[0][found], scores[0][found], timings
+
+
+def hybrid_search(query, keyword_index, engine=None, encoder=None, item_to_catalog=None,
+                  k=10, depth=100, rrf_k=60):
+    """Keyword (BM25) + vector retrieval merged with reciprocal rank fusion.
+
+    Each retriever contributes its top `depth` catalog rows; a row scores
+    sum(1 / (rrf_k + rank)) over the lists it appears in, so exact note/name
+    matches and semantic neighbours both surface. Without an engine this is
+    plain keyword search. Returns (catalog rows, fused scores, timings).
+    """
+    timings = {}
+    start = time.perf_counter()
+    ranked = [keyword_index.search(query, depth)[0]]
+    timings['keyword_ms'] = (time.perf_counter() - start) * 1000
+
+    if engine is not None:
+        ids, _, vec_timings = semantic_search(engine, encoder, query, depth)
+        ranked.append(np.asarray(item_to_catalog)[ids])
+        timings.update(vec_timings)
+
+    start = time.perf_counter()
+    fused = {}
+    for rows in ranked:
+        for rank, row in enumerate(rows.tolist()):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank + 1)
+    best = sorted(fused.items(), key=lambda item: -item[1])[:k]
+    timings['fusion_ms'] = (time.perf_counter() - start) * 1000
+    rows = np.array([r for r, _ in best], dtype=np.int64)
+    scores = np.array([s for _, s in best], dtype=np.float32)
+    return rows, scores, timings
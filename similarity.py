@@ -0,0 +1,168 @@
+import numpy as np
+
+# --- CONFIGURATION ---
+# Above this many vectors the dashboard builds the approximate (IVF) index
+APPROX_THRESHOLD = 200_000
+BLOCK_ROWS = 65_536  # catalog rows scored per matmul block (bounds temp memory)
+
+
+def normalize_rows(vectors):
+    """Unit-length rows; float32/float16 input that already is one is returned untouched.
+
+    Stores are normalized when written (embedding_store.py), so the memory map is
+    used in place whatever its dtype; anything else becomes a float32 copy.
+    """
+    if vectors.dtype in (np.float32, np.float16) and len(vectors) and _unit_rows(vectors): return vectors
+    out = np.asarray(vectors, dtype=np.float32).copy()
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    out /= np.maximum(norms, 1e-12)
+    return out
+
+
+def _unit_rows(vectors):
+    # Checked block by block (first block first), so a memory map is never copied whole
+    atol = 1e-2 if vectors.dtype == np.float16 else 1e-3
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        norms = np.linalg.norm(_f32(vectors[start:start + BLOCK_ROWS]), axis=1)
+        if not np.allclose(norms, 1.0, atol=atol): return False
+    return True
+
+
+def _f32(block):
+    # Scores are computed in float32; a float16 store is upcast one block at a time
+    return np.asarray(block, dtype=np.float32)
+
+
+def _top_k(scores, k):
+    """Column ids + scores of the k best entries per row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((len(scores), 0), dtype=np.int64), np.zeros((len(scores), 0), dtype=np.float32)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class SimilarityEngine:
+    """Cosine nearest neighbours over the perfume embeddings.
+
+    Exact search is a blocked matrix multiply + argpartition. build_ivf() adds an
+    inverted-file index (spherical k-means lists) for catalogs where scanning
+    every vector per query gets too slow.
+    """
+
+    def __init__(self, vectors):
+        self.vectors = normalize_rows(vectors)
+        self.centroids = None
+        self.list_offsets = None
+        self.list_members = None
+
+    def __len__(self):
+        return len(self.vectors)
+
+    # --- EXACT SEARCH ---
+    def search(self, queries, k=10, exclude=None):
+        """Top-k (ids, scores) for a batch of query vectors (n_queries x dim).
+
+        exclude: optional id per query to drop from its results (the perfume itself).
+        """
+        queries = normalize_rows(_f32(np.atleast_2d(queries)))
+        extra = 0 if exclude is None else 1
+        best_ids, best_scores = None, None
+        for start in range(0, len(self.vectors), BLOCK_ROWS):
+            block = _f32(self.vectors[start:start + BLOCK_ROWS])
+            ids, scores = _top_k(queries @ block.T, k + extra)
+            ids += start
+            if best_ids is None:
+                best_ids, best_scores = ids, scores
+            else:
+                merged_ids = np.concatenate([best_ids, ids], axis=1)
+                pick, best_scores = _top_k(np.concatenate([best_scores, scores], axis=1), k + extra)
+                best_ids = np.take_along_axis(merged_ids, pick, axis=1)
+        return self._drop_excluded(best_ids, best_scores, exclude, k)
+
+    def similar_to(self, item, k=10, approximate=False, n_probe=8):
+        """Nearest perfumes to a stored vector, excluding the perfume itself."""
+        query = self.vectors[item:item + 1]
+        if approximate and self.centroids is not None:
+            ids, scores = self.search_ivf(query, k, n_probe=n_probe, exclude=[item])
+        else:
+            ids, scores = self.search(query, k, exclude=[item])
+        found = ids[0] >= 0
+        return ids[0][found], scores[0][found]
+
+    @staticmethod
+    def _drop_excluded(ids, scores, exclude, k):
+        if exclude is None: return ids[:, :k], scores[:, :k]
+        keep = ids != np.asarray(exclude).reshape(-1, 1)
+        # Stable argsort of ~keep moves dropped hits to the back, preserving rank order
+        order = np.argsort(~keep, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+    # --- APPROXIMATE SEARCH (IVF) ---
+    def build_ivf(self, n_lists=None, n_iter=10, sample_size=50_000, seed=0):
+        """Clusters the vectors into n_lists cells; search_ivf only scans the closest cells."""
+        n = len(self.vectors)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = _f32(self.vectors[np.sort(rng.choice(n, size=min(sample_size, n), replace=False))])
+        n_lists = min(n_lists, len(sample))
+
+        # Spherical k-means: assign by max cosine, re-normalized means as centroids
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        assign = self._nearest_centroid(self.vectors, centroids)
+        self.centroids = centroids
+        self.list_members = np.argsort(assign, kind='stable')
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        return self
+
+    @staticmethod
+    def _nearest_centroid(vectors, centroids):
+        out = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), BLOCK_ROWS):
+            out[start:start + BLOCK_ROWS] = np.argmax(_f32(vectors[start:start + BLOCK_ROWS]) @ centroids.T, axis=1)
+        return out
+
+    def search_ivf(self, queries, k=10, n_probe=8, exclude=None):
+        """Approximate top-k: exact scores, but only over the n_probe closest lists."""
+        if self.centroids is None: raise RuntimeError("call build_ivf() first")
+        queries = normalize_rows(_f32(np.atleast_2d(queries)))
+        extra = 0 if exclude is None else 1
+        probes, _ = _top_k(queries @ self.centroids.T, n_probe)
+
+        all_ids = np.full((len(queries), k + extra), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k + extra), -np.inf, dtype=np.float32)
+        for q, lists in enumerate(probes):
+            cands = np.concatenate([self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]] for c in lists])
+            ids, scores = _top_k(queries[q:q + 1] @ _f32(self.vectors[cands]).T, k + extra)
+            all_ids[q, :ids.shape[1]] = cands[ids[0]]
+            all_scores[q, :ids.shape[1]] = scores[0]
+        return self._drop_excluded(all_ids, all_scores, exclude, k)
+
+
+def catalog_similarity(vectors, store_rows):
+    """Engine restricted to vectors that belong to catalog rows.
+
+    store_rows: store row per catalog row (-1 = no vector), see embedding_store.align_rows.
+    Returns (engine, catalog_to_item, item_to_catalog).
+    """
+    store_rows = np.asarray(store_rows)
+    has_vec = np.flatnonzero(store_rows >= 0)
+    if len(has_vec) == len(vectors) and np.array_equal(store_rows[has_vec], np.arange(len(vectors))):
+        engine = SimilarityEngine(vectors)  # Same order: keep using the shared memory map
+    else:
+        engine = SimilarityEngine(np.asarray(vectors)[store_rows[has_vec]])
+    catalog_to_item = np.full(len(store_rows), -1, dtype=np.int64)
+    catalog_to_item[has_vec] = np.arange(len(has_vec))
+    if len(engine) > APPROX_THRESHOLD:
+        engine.build_ivf()
+    return engine, catalog_to_item, has_vec